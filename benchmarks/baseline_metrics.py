@@ -0,0 +1,96 @@
+"""
+The per-query metric functions as they were before the batched kernel and URL interning
+(uncached normalize_url, one normalization pass per function call), kept verbatim so the
+benchmarks can time the original per-function path rather than today's faster one.
+"""
+import math
+from urllib.parse import urlparse
+
+import pandas as pd
+
+
+def normalize_url(url: str) -> str:
+    if not url: return ""
+    try:
+        parsed = urlparse(url)
+        netloc = parsed.netloc.lower().replace("www.", "")
+        path = parsed.path.rstrip("/")
+        return f"{netloc}{path}"
+    except:
+        return url
+
+
+def precision_at_k(baseline_urls, target_urls, k=10):
+    norm_base = set(normalize_url(u) for u in baseline_urls)
+    norm_target = [normalize_url(u) for u in target_urls][:k]
+    if not norm_target: return 0.0
+    hits = sum(1 for url in norm_target if url in norm_base)
+    return hits / k
+
+
+def recall_at_k(baseline_urls, target_urls, k=10):
+    norm_base = set(normalize_url(u) for u in baseline_urls)
+    norm_target = [normalize_url(u) for u in target_urls][:k]
+
+    total_relevant = len(norm_base)
+    if total_relevant == 0: return 0.0
+
+    hits = sum(1 for url in norm_target if url in norm_base)
+    return hits / total_relevant
+
+
+def average_precision(baseline_urls, target_urls, k=10):
+    norm_base = set(normalize_url(u) for u in baseline_urls)
+    norm_target = [normalize_url(u) for u in target_urls][:k]
+    hits = 0
+    sum_precisions = 0.0
+    for i, url in enumerate(norm_target):
+        if url in norm_base:
+            hits += 1
+            sum_precisions += (hits / (i + 1))
+    possible_hits = min(len(norm_base), k)
+    return sum_precisions / possible_hits if possible_hits > 0 else 0.0
+
+
+def ndcg_at_k(baseline_urls, target_urls, k=10):
+    relevance_map = {}
+    norm_base = [normalize_url(u) for u in baseline_urls]
+    for rank, url in enumerate(norm_base):
+        if rank >= k: break
+        relevance_map[url] = k - rank
+
+    dcg = 0.0
+    norm_target = [normalize_url(u) for u in target_urls][:k]
+    for i, url in enumerate(norm_target):
+        rel = relevance_map.get(url, 0)
+        dcg += rel / math.log2(i + 2)
+
+    idcg = 0.0
+    ideal_rels = sorted(relevance_map.values(), reverse=True)
+    for i, rel in enumerate(ideal_rels):
+        idcg += rel / math.log2(i + 2)
+
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+def calculate_jaccard(list_a, list_b):
+    set_a = set(normalize_url(u) for u in list_a)
+    set_b = set(normalize_url(u) for u in list_b)
+    intersection = len(set_a.intersection(set_b))
+    union = len(set_a.union(set_b))
+    return intersection / union if union > 0 else 0.0
+
+
+def robust_spearman(list_a, list_b):
+    norm_a = [normalize_url(u) for u in list_a]
+    norm_b = [normalize_url(u) for u in list_b]
+    universe = list(set(norm_a) | set(norm_b))
+    if len(universe) <= 1: return 0.0
+
+    rank_map_a = {url: i + 1 for i, url in enumerate(norm_a)}
+    rank_map_b = {url: i + 1 for i, url in enumerate(norm_b)}
+
+    vec_a = [rank_map_a.get(u, 11) for u in universe]
+    vec_b = [rank_map_b.get(u, 11) for u in universe]
+
+    return pd.Series(vec_a).corr(pd.Series(vec_b), method='spearman')
@@ -0,0 +1,58 @@
+"""
+N-way engine comparison: the shared-precomputation pairwise kernel (src.metrics.pairwise)
+against one compute_batch_metrics call per ordered engine pair, checking identical results.
+
+    python benchmarks/bench_engine_matrix.py --queries 20000 --engines 6
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_result_set
+from src.metrics.batch_metrics import compute_batch_metrics
+from src.metrics.pairwise import EncodedLists, pairwise_metrics
+from src.utils.url_table import URLTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pairwise engine matrix benchmark")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--engines", type=int, default=6, help="Engines including the baseline")
+    args = parser.parse_args()
+
+    results = make_result_set(args.queries, engines=tuple(f"Engine {i}" for i in range(1, args.engines)))
+    queries = list(results["Google"])
+    lists = {engine: [results[engine].get(q, []) for q in queries] for engine in results}
+    pairs = len(lists) * (len(lists) - 1)
+
+    start = time.perf_counter()
+    naive = {(a, b): compute_batch_metrics(lists[a], lists[b], url_table=URLTable())
+             for a in lists for b in lists if a != b}
+    naive_time = time.perf_counter() - start
+    print(f"per pair     {naive_time:8.2f} s  ({pairs} ordered pairs x {args.queries} queries)")
+
+    start = time.perf_counter()
+    url_table = URLTable()
+    encoded = {engine: EncodedLists([url_table.encode(urls) for urls in engine_lists])
+               for engine, engine_lists in lists.items()}
+    prepared = time.perf_counter()
+    shared = pairwise_metrics(encoded)
+    end = time.perf_counter()
+    shared_time = end - start
+    print(f"shared       {shared_time:8.2f} s  (prepare {prepared - start:.2f} s, pairs {end - prepared:.2f} s)  "
+          f"speedup {naive_time / shared_time:4.2f}x")
+
+    for pair, metrics in naive.items():
+        for name, values in metrics.items():
+            assert np.array_equal(values, shared[pair][name], equal_nan=True), f"{name} differs for {pair}"
+
+
+if __name__ == "__main__":
+    main()
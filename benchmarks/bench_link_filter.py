@@ -0,0 +1,82 @@
+"""
+Throughput of the compiled link filter (src.scraper.link_filter) against the previous
+BaseEngine.is_valid, over synthetic SERP anchors mixing result links with navigation noise
+(SERP links, login/settings pages, ads, javascript: anchors). Checks identical decisions and
+reports rejection reasons.
+
+    python benchmarks/bench_link_filter.py --links 50000 --noise 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import raw_urls
+from src.scraper.link_filter import LinkFilter
+
+NOISE = [
+    "https://www.bing.com/search?q=next+page&first=11",
+    "https://www.google.com/search?q=related",
+    "https://search.yahoo.com/search?p=more",
+    "https://accounts.example.com/login?continue=serp",
+    "https://www.bing.com/account/general?form=SETTINGS",
+    "https://policies.example.com/privacy",
+    "https://www.bing.com/aclick?ld=e8ad",
+    "https://support.example.com/cookie-settings",
+    "javascript:void(0)",
+    "#",
+]
+
+
+def legacy_is_valid(link, seen_set):
+    """BaseEngine.is_valid before the compiled filter."""
+    if not link: return False
+    if not link.startswith("http"): return False
+    if link in seen_set: return False
+    forbidden_terms = ["aclick", "login", "signup", "preferences", "settings", "privacy", "terms", "cookie",
+                       "advertisement", "form=", "adurl"]
+    if "/search?" in link or "search." in link: return False
+    if "bing.com/search" in link or "google.com/search" in link: return False
+    if any(term in link for term in forbidden_terms): return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link filter throughput benchmark")
+    parser.add_argument("--links", type=int, default=50000)
+    parser.add_argument("--noise", type=float, default=0.3, help="Share of navigation / ad / SERP links")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per filter (the fastest is reported)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    links = [rng.choice(NOISE) if rng.random() < args.noise else url for url in raw_urls(args.links)]
+    link_filter = LinkFilter.from_config()
+    seen = set()
+
+    def best(fn):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    legacy_time = best(lambda: [legacy_is_valid(link, seen) for link in links])
+    compiled_time = best(lambda: [link_filter.rejection(link, seen) for link in links])
+    print(f"legacy is_valid  {legacy_time * 1000:8.1f} ms  ({len(links) / legacy_time:,.0f} links/s)")
+    print(f"LinkFilter       {compiled_time * 1000:8.1f} ms  ({len(links) / compiled_time:,.0f} links/s)  "
+          f"speedup {legacy_time / compiled_time:4.2f}x")
+
+    reasons = Counter(link_filter.rejection(link, seen) for link in links)
+    assert all(legacy_is_valid(link, seen) == link_filter.is_valid(link, seen) for link in links)
+    print("rejections: " + ", ".join(f"{reason}={n}" for reason, n in reasons.most_common() if reason))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Counts WebDriver round-trips needed to read the links of one SERP: the previous per-element
+`find_elements` + `get_attribute("href")` loop against the single `execute_script` call.
+A counting stand-in driver serves canned pages from serp_fixture_server, so no browser is needed.
+
+    python benchmarks/bench_link_roundtrips.py --anchors 300 --latency-ms 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import lxml.html
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from serp_fixture_server import render_serp
+from src.scraper import BingEngine
+
+
+class CountingElement:
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+
+    def get_attribute(self, name):
+        self.driver.round_trip()
+        return self.node.get(name)
+
+    def find_elements(self, by, value):
+        self.driver.round_trip()
+        return [CountingElement(self.driver, n) for n in self.node.cssselect(value)]
+
+
+class CountingDriver:
+    """Stand-in WebDriver over a parsed page; every call costs one simulated round-trip."""
+
+    def __init__(self, html, latency):
+        self.doc = lxml.html.document_fromstring(html)
+        self.latency = latency
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def find_elements(self, by, value):
+        return CountingElement(self, self.doc).find_elements(by, value)
+
+    def execute_script(self, script, root=None, link_selector=None):
+        self.round_trip()
+        node = root.node if root is not None else self.doc
+        results = set(node.cssselect(link_selector)) if link_selector else set()
+        return [[a.get("href"), i, a in results] for i, a in enumerate(node.cssselect("a")) if a.get("href")]
+
+
+def legacy_get_links(engine, container, seen):
+    """The previous per-element loop in Google/Bing/YahooEngine.get_links."""
+    results = []
+    for elem in container.find_elements("css selector", "a"):
+        try:
+            link = engine.process_link(elem.get_attribute("href"))
+            if engine.is_valid(link, seen):
+                results.append(link)
+                seen.add(link)
+        except:
+            continue
+        if len(results) >= engine.limit: break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebDriver round-trips per SERP")
+    parser.add_argument("--anchors", type=int, default=300, help="Anchors on the page")
+    parser.add_argument("--latency-ms", type=float, default=3.0, help="Simulated cost of one WebDriver call")
+    args = parser.parse_args()
+
+    urls = [f"https://example{i}.com/page" for i in range(args.anchors)]
+    html = render_serp("bing", "benchmark", urls)
+    config = {"url": "", "container": "ol#b_results", "link_selector": "li.b_algo h2 a"}
+    # A limit above the number of valid links forces a full scan, as on sparse SERPs
+    engine = BingEngine(config, args.anchors + 1, 0, 0)
+
+    paths = [
+        ("per-element", lambda driver, container: legacy_get_links(engine, container, set())),
+        ("execute_script", lambda driver, container: engine.get_links(driver, container, set())),
+    ]
+    for label, extract in paths:
+        driver = CountingDriver(html, args.latency_ms / 1000)
+        container = CountingElement(driver, driver.doc.cssselect("ol#b_results")[0])
+        start = time.perf_counter()
+        links = extract(driver, container)
+        elapsed = time.perf_counter() - start
+        print(f"{label:15s} round-trips: {driver.round_trips:5d}  time: {elapsed * 1000:8.1f} ms  links: {len(links)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the batched kernel in src.metrics.batch_metrics against two per-function paths:
+the original Evaluator loop's functions (vendored in baseline_metrics) and today's
+src.metrics functions, which share the memoized normalizer and URL table.
+
+    python benchmarks/bench_metric_kernel.py --queries 100000 --reference-queries 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.metrics import ranking_metrics, similarity_metrics
+from src.metrics.batch_metrics import compute_batch_metrics
+from synthetic import make_lists
+import baseline_metrics
+
+# name -> (ranking functions, similarity functions)
+REFERENCES = {
+    "original per-function": (baseline_metrics, baseline_metrics),
+    "current per-function": (ranking_metrics, similarity_metrics),
+}
+
+
+def per_function_path(baselines, targets, ranking=ranking_metrics, similarity=similarity_metrics, k=10):
+    rows = []
+    for base_urls, target_urls in zip(baselines, targets):
+        row = [
+            similarity.calculate_jaccard(base_urls, target_urls),
+            similarity.robust_spearman(base_urls, target_urls),
+            ranking.ndcg_at_k(base_urls, target_urls),
+            ranking.average_precision(base_urls, target_urls),
+            ranking.precision_at_k(base_urls, target_urls, k=10),
+        ]
+        for j in range(1, k + 1):
+            row.append(ranking.precision_at_k(base_urls, target_urls, k=j))
+            row.append(ranking.recall_at_k(base_urls, target_urls, k=j))
+        rows.append(row)
+    return rows
+
+
+def check_parity(reference, batch):
+    ref = np.array(reference, dtype=float)
+    batch = {name: values[:len(ref)] for name, values in batch.items()}
+    assert np.allclose(ref[:, 0], batch["Jaccard"])
+    assert np.allclose(ref[:, 1], batch["Spearman"], equal_nan=True)
+    assert np.allclose(ref[:, 2], batch["NDCG"])
+    assert np.allclose(ref[:, 3], batch["AP"])
+    assert np.allclose(ref[:, 5::2], batch["P@k"])
+    assert np.allclose(ref[:, 6::2], batch["R@k"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-function vs batched metric kernel benchmark")
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--reference-queries", type=int, default=20000,
+                        help="Queries timed on the per-function paths (the first ones of the batch)")
+    parser.add_argument("--skip-reference", action="store_true", help="Only time the batched kernel")
+    args = parser.parse_args()
+
+    baselines, targets = make_lists(args.queries)
+
+    start = time.perf_counter()
+    batch = compute_batch_metrics(baselines, targets, k=10)
+    batch_time = time.perf_counter() - start
+    print(f"batched kernel:      {batch_time:8.2f}s  ({args.queries / batch_time:,.0f} queries/s)")
+
+    if args.skip_reference:
+        return
+
+    n_ref = min(args.reference_queries, args.queries)
+    batch_rate = args.queries / batch_time
+    for name, (ranking, similarity) in REFERENCES.items():
+        start = time.perf_counter()
+        reference = per_function_path(baselines[:n_ref], targets[:n_ref], ranking, similarity)
+        ref_time = time.perf_counter() - start
+        print(f"{name + ':':21s}{ref_time:8.2f}s  ({n_ref / ref_time:,.0f} queries/s, "
+              f"kernel speedup {batch_rate * ref_time / n_ref:.1f}x)")
+        check_parity(reference, batch)
+    print("parity:              OK")
+
+
+if __name__ == "__main__":
+    main()
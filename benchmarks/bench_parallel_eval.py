@@ -0,0 +1,49 @@
+"""
+Scaling of the sharded metric pool (src.evaluation.parallel) over worker counts, checking
+that every run returns arrays identical to the serial kernel.
+
+    python benchmarks/bench_parallel_eval.py --queries 200000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_lists
+from src.metrics.batch_metrics import compute_batch_metrics
+from src.evaluation.parallel import ShardedMetricPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded metric computation scaling benchmark")
+    parser.add_argument("--queries", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    baselines, targets = make_lists(args.queries)
+
+    start = time.perf_counter()
+    serial = compute_batch_metrics(baselines, targets, k=10)
+    serial_time = time.perf_counter() - start
+    print(f"serial       {serial_time:8.2f} s  ({args.queries / serial_time:,.0f} queries/s)  [{os.cpu_count()} CPUs]")
+
+    for workers in args.workers:
+        with ShardedMetricPool(workers, shard_size=args.shard_size) as pool:
+            start = time.perf_counter()
+            metrics = pool.compute(baselines, targets)
+            elapsed = time.perf_counter() - start
+        for name, values in serial.items():
+            assert np.array_equal(values, metrics[name], equal_nan=True), f"{name} differs at {workers} workers"
+        print(f"workers={workers:<3d} {elapsed:8.2f} s  ({args.queries / elapsed:,.0f} queries/s)  "
+              f"speedup {serial_time / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+CLI startup cost from `python -X importtime`: total import time, the slowest top-level imports,
+and a regression guard that fails when a command pulls in a heavy dependency it should not need
+or exceeds its import-time budget.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 300 --top 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNNER = os.path.join(PROJECT_ROOT, "experiments", "experiment_runner.py")
+
+HEAVY = ["selenium", "aiohttp", "lxml", "pandas", "scipy", "sklearn", "matplotlib", "seaborn", "pyarrow"]
+
+# (label, python arguments, heavy packages that may be imported)
+SCENARIOS = [
+    ("runner --help", [RUNNER, "--help"], []),
+    ("import src.scraper", ["-c", "import src.scraper"], []),
+    ("import src.metrics", ["-c", "import src.metrics"], []),
+    ("import src.evaluation", ["-c", "import src.evaluation"], []),
+    # pandas itself probes for pyarrow when it is installed
+    ("import src.evaluation.evaluator", ["-c", "import src.evaluation.evaluator"], ["pandas", "pyarrow"]),
+]
+
+
+def import_times(args):
+    """Runs `python -X importtime <args>`; returns ({module: (self_us, cumulative_us)}, top-level modules)."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=PROJECT_ROOT, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    times = {}
+    top_level = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+        # Top-level imports are the unindented entries
+        if not name[1:].startswith(" "):
+            top_level.append(name.strip())
+    return times, top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI import-time benchmark and regression guard")
+    parser.add_argument("--budget-ms", type=float, default=250.0,
+                        help="Max total import time for scenarios that import no heavy package")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to show per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (the fastest is reported)")
+    args = parser.parse_args()
+
+    failures = []
+    for label, command, allowed in SCENARIOS:
+        runs = [import_times(command) for _ in range(args.repeat)]
+        times, top_level = min(runs, key=lambda run: sum(run[0][name][1] for name in run[1]))
+        total_ms = sum(times[name][1] for name in top_level) / 1000
+        heavy = sorted(pkg for pkg in HEAVY if pkg in times and pkg not in allowed)
+
+        print(f"{label:34s} {total_ms:8.1f} ms")
+        for name in sorted(top_level, key=lambda n: -times[n][1])[:args.top]:
+            print(f"    {times[name][1] / 1000:8.1f} ms  {name}")
+
+        if heavy:
+            failures.append(f"{label}: imports {', '.join(heavy)}")
+        if not allowed and total_ms > args.budget_ms:
+            failures.append(f"{label}: {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    if failures:
+        print("\nStartup regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nNo startup regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Offline performance suite over synthetic SERP data: URL normalization, every per-query metric
+function, the batched kernel, bootstrap_ci, 100x10 repeated k-fold, 10k-permutation tests,
+results-store writes/reads and a full Evaluator.run.
+Each case runs in a fresh subprocess so its peak RSS is its own. Results (seconds, throughput,
+peak RSS) are written as JSON, for comparing runs across commits.
+
+    python benchmarks/run_suite.py --queries 1000 10000 --output bench.json
+    python benchmarks/run_suite.py --queries 100000 --cases normalize_url evaluator_run --overlap 0.6
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_lists, make_result_set, raw_urls
+
+METRIC_FUNCTIONS = {
+    "precision_at_k": ("src.metrics.ranking_metrics", "precision_at_k"),
+    "recall_at_k": ("src.metrics.ranking_metrics", "recall_at_k"),
+    "average_precision": ("src.metrics.ranking_metrics", "average_precision"),
+    "ndcg_at_k": ("src.metrics.ranking_metrics", "ndcg_at_k"),
+    "calculate_jaccard": ("src.metrics.similarity_metrics", "calculate_jaccard"),
+    "robust_spearman": ("src.metrics.similarity_metrics", "robust_spearman"),
+    "robust_kendall": ("src.metrics.similarity_metrics", "robust_kendall"),
+}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def case_normalize_url(args):
+    from src.utils.normalization import normalize_url, _normalize_url_cached
+    urls = raw_urls(args.queries * args.depth, pool_size=args.pool_size, seed=args.seed)
+    _normalize_url_cached.cache_clear()
+    return timed(lambda: [normalize_url(u) for u in urls]), len(urls), "urls"
+
+
+def case_decode_bing_redirect(args):
+    from src.utils.normalization import decode_bing_redirect
+    urls = raw_urls(args.queries * args.depth, pool_size=args.pool_size, seed=args.seed)
+    return timed(lambda: [decode_bing_redirect(u) for u in urls]), len(urls), "urls"
+
+
+def metric_case(name):
+    module, attr = METRIC_FUNCTIONS[name]
+
+    def run(args):
+        fn = getattr(__import__(module, fromlist=[attr]), attr)
+        baselines, targets = make_lists(args.queries, args.depth, args.pool_size, args.overlap, args.seed)
+        return timed(lambda: [fn(b, t) for b, t in zip(baselines, targets)]), args.queries, "queries"
+    return run
+
+
+def case_compute_batch_metrics(args):
+    from src.metrics.batch_metrics import compute_batch_metrics
+    from src.utils.url_table import URLTable
+    baselines, targets = make_lists(args.queries, args.depth, args.pool_size, args.overlap, args.seed)
+    return timed(lambda: compute_batch_metrics(baselines, targets, url_table=URLTable())), args.queries, "queries"
+
+
+def case_bootstrap_ci(args):
+    import numpy as np
+    from src.evaluation.bootstrap import bootstrap_ci
+    data = np.random.default_rng(args.seed).beta(2, 5, size=args.queries)
+    return timed(lambda: bootstrap_ci(data, n_bootstraps=1000, seed=args.seed)), args.queries, "values"
+
+
+def case_repeated_kfold(args):
+    import numpy as np
+    from src.evaluation.cross_validation import repeated_kfold
+    rng = np.random.default_rng(args.seed)
+    # Two engines x six metric columns, as in an evaluation
+    scores = {(engine, metric): rng.beta(2, 5, size=args.queries) for engine in ("Bing", "Yahoo!") for metric in range(6)}
+    return timed(lambda: repeated_kfold(scores, k_folds=10, repeats=100, seed=args.seed)), args.queries, "queries"
+
+
+def case_permutation_tests(args):
+    import numpy as np
+    from src.metrics.statistical_tests import permutation_tests
+    rng = np.random.default_rng(args.seed)
+    scores = {(engine, metric): rng.beta(2, 5, size=args.queries) for engine in ("Bing", "Yahoo!") for metric in range(6)}
+    pairs = [(("Bing", metric), ("Yahoo!", metric)) for metric in range(6)]
+    return timed(lambda: permutation_tests(scores, pairs, n_permutations=10000, seed=args.seed)), args.queries, "queries"
+
+
+def write_result_set(results, run_dir, backend):
+    from src.utils.io_utils import add_query_result
+    from src.utils.results_store import close_results_stores
+    for engine, engine_results in results.items():
+        for query, urls in engine_results.items():
+            add_query_result(run_dir, engine, query, urls, backend)
+    close_results_stores()
+
+
+def case_add_query_result(args):
+    results = make_result_set(args.queries, depth=args.depth, pool_size=args.pool_size, overlap=args.overlap,
+                              seed=args.seed)
+    records = sum(len(r) for r in results.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        return timed(lambda: write_result_set(results, tmp, args.backend)), records, "records"
+
+
+def case_load_results(args):
+    from src.utils.io_utils import load_results
+    results = make_result_set(args.queries, depth=args.depth, pool_size=args.pool_size, overlap=args.overlap,
+                              seed=args.seed)
+    records = sum(len(r) for r in results.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        write_result_set(results, tmp, args.backend)
+        del results
+        return timed(lambda: [load_results(tmp, engine) for engine in ("Google", "Bing", "Yahoo!")]), records, "records"
+
+
+def case_evaluator_run(args):
+    import logging
+    from src.evaluation.evaluator import Evaluator
+    logging.disable(logging.INFO)
+    results = make_result_set(args.queries, depth=args.depth, pool_size=args.pool_size, overlap=args.overlap,
+                              seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        task1, task2 = os.path.join(tmp, "task1"), os.path.join(tmp, "task2")
+        write_result_set(results, os.path.join(task1, "run"), args.backend)
+        os.makedirs(task2)
+        del results
+        evaluator = Evaluator(task1, task2, streaming=args.stream, plots=None if args.plots else [])
+        return timed(evaluator.run), args.queries, "queries"
+
+
+CASES = {
+    "normalize_url": case_normalize_url,
+    "decode_bing_redirect": case_decode_bing_redirect,
+    **{name: metric_case(name) for name in METRIC_FUNCTIONS},
+    "compute_batch_metrics": case_compute_batch_metrics,
+    "bootstrap_ci": case_bootstrap_ci,
+    "repeated_kfold": case_repeated_kfold,
+    "permutation_tests": case_permutation_tests,
+    "add_query_result": case_add_query_result,
+    "load_results": case_load_results,
+    "evaluator_run": case_evaluator_run,
+}
+
+
+def run_case(args):
+    """Runs one case in this process and prints its result as one JSON line."""
+    seconds, items, unit = CASES[args.case](args)
+    print(json.dumps({"case": args.case, "queries": args.queries, "seconds": round(seconds, 6),
+                      "items": items, "throughput": round(items / seconds, 1) if seconds else None,
+                      "unit": f"{unit}/s", "peak_rss_mb": round(peak_rss_mb() or 0, 1)}))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_args(args, case, queries):
+    argv = ["--case", case, "--queries", str(queries), "--depth", str(args.depth), "--overlap", str(args.overlap),
+            "--pool-size", str(args.pool_size), "--seed", str(args.seed), "--backend", args.backend]
+    return argv + (["--stream"] if args.stream else []) + (["--plots"] if args.plots else [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-SERP performance suite")
+    parser.add_argument("--queries", type=int, nargs="+", default=[1000, 10000], help="Query counts to run")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--depth", type=int, default=10, help="Results per list")
+    parser.add_argument("--overlap", type=float, default=0.4, help="Share of baseline URLs kept by target engines")
+    parser.add_argument("--pool-size", type=int, default=50000, help="Distinct destination URLs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["jsonl", "sqlite"], default="jsonl", help="Results store backend")
+    parser.add_argument("--stream", action="store_true", help="Run evaluator_run in streaming mode")
+    parser.add_argument("--plots", action="store_true", help="Render plots in evaluator_run")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        args.queries = args.queries[0]
+        return run_case(args)
+
+    results = []
+    for queries in args.queries:
+        for case in args.cases:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__)] + case_args(args, case, queries),
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{case} ({queries} queries) failed:\n{proc.stderr[-2000:]}", file=sys.stderr)
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{case:24s} {queries:>9d} q  {result['seconds']:9.3f} s  {result['throughput'] or 0:>14,.0f} "
+                  f"{result['unit']:12s} {result['peak_rss_mb']:8.1f} MB", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": {"depth": args.depth, "overlap": args.overlap, "pool_size": args.pool_size, "seed": args.seed,
+                       "backend": args.backend, "stream": args.stream, "plots": args.plots},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Local HTTP server that serves canned SERP pages shaped like Google, Bing and Yahoo results,
+so the scraper can be exercised offline. Queries starting with `fault:<name>` get a failure
+instead (see FAULTS): a CAPTCHA page, a page without a result container, or HTTP 429.
+
+    python benchmarks/serp_fixture_server.py --port 8765 --write-config /tmp/fixture.yaml
+    python experiments/experiment_runner.py --task scrape --config /tmp/fixture.yaml
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import bing_redirect
+
+ENGINE_PATHS = {"Google": "google", "Bing": "bing", "Yahoo!": "yahoo"}
+FAULTS = ("captcha", "no-container", "throttle")
+
+
+def result_urls(engine, query, depth=10):
+    """Deterministic ranked results; engines share part of their results for the same query."""
+    seed = int(hashlib.md5(query.encode("utf-8")).hexdigest(), 16)
+    shared = [f"https://www.site{(seed + i) % 977}.org/{quote(query.split()[0] if query.split() else 'q')}/{i}/"
+              for i in range(depth)]
+    rng = random.Random(f"{engine}:{seed}")
+    urls = [u if rng.random() < 0.6 else f"https://{engine}-only{rng.randint(0, 999)}.com/doc{i}" for i, u in enumerate(shared)]
+    rng.shuffle(urls)
+    return urls
+
+
+def render_serp(engine, query, urls):
+    noise = ('<a href="https://accounts.example.com/login">Sign in</a>'
+             '<a href="/search?q=related">Related</a>'
+             '<a href="https://www.example.com/preferences">Settings</a>')
+    if engine == "google":
+        items = "".join(f'<div class="g"><a href="{escape(u)}"><h3>Result {i}</h3></a></div>' for i, u in enumerate(urls))
+        body = f'<div id="search">{items}</div>'
+    elif engine == "bing":
+        items = "".join(f'<li class="b_algo"><h2><a href="{escape(bing_redirect(u))}">Result {i}</a></h2></li>'
+                        for i, u in enumerate(urls))
+        body = f'<ol id="b_results">{items}</ol>'
+    else:
+        items = "".join(f'<div class="algo"><h3 class="title"><a href="{escape(u)}">Result {i}</a></h3></div>'
+                        for i, u in enumerate(urls))
+        body = f'<div id="main">{items}</div>'
+    return f"<html><head><title>{escape(query)}</title></head><body>{noise}{body}</body></html>"
+
+
+def render_captcha(query):
+    return (f"<html><head><title>{escape(query)}</title></head><body><form action=\"/sorry\">"
+            "<p>Please verify you are human to continue.</p></form></body></html>")
+
+
+def render_shell(query):
+    """A JavaScript-rendered SERP before its script has run: navigation and footer links only."""
+    links = ('<a href="https://www.example-news.com/today">News</a>'
+             '<a href="https://maps.example.org/">Maps</a>'
+             '<a href="https://www.example-help.net/privacy">Privacy</a>')
+    return (f"<html><head><title>{escape(query)}</title></head><body><nav>{links}</nav>"
+            "<div id=\"app\"></div><script src=\"/serp.js\"></script></body></html>")
+
+
+def query_fault(query):
+    """The fault a `fault:<name> ...` query asks for, else None."""
+    if not query.startswith("fault:"):
+        return None
+    fault = query[len("fault:"):].split(" ")[0]
+    return fault if fault in FAULTS else None
+
+
+class SERPHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        engine = parsed.path.strip("/").split("/")[0]
+        params = parse_qs(parsed.query)
+        query = (params.get("q") or params.get("p") or [""])[0]
+        if engine not in ENGINE_PATHS.values():
+            self.send_error(404)
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        fault = query_fault(query)
+        if fault == "throttle":
+            self.send_error(429)
+            return
+        if fault == "captcha":
+            page = render_captcha(query)
+        elif fault == "no-container":
+            page = render_shell(query)
+        else:
+            page = render_serp(engine, query, result_urls(engine, query))
+        page = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fixture_config(base_config, host, port):
+    """Copy of an experiment config whose engine URLs point at the fixture server."""
+    config = dict(base_config)
+    config["search_engines"] = {name: dict(cfg) for name, cfg in base_config["search_engines"].items()}
+    for name, cfg in config["search_engines"].items():
+        param = "p" if name == "Yahoo!" else "q"
+        cfg["url"] = f"http://{host}:{port}/{ENGINE_PATHS[name]}/search?{param}="
+    return config
+
+
+def serve(host="127.0.0.1", port=8765, latency=0.0):
+    SERPHandler.latency = latency
+    server = ThreadingHTTPServer((host, port), SERPHandler)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canned SERP fixture server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request latency (s)")
+    parser.add_argument("--config", default=os.path.join(PROJECT_ROOT, "config", "experiment.yaml"))
+    parser.add_argument("--write-config", help="Write a config pointing the engines at this server")
+    args = parser.parse_args()
+
+    if args.write_config:
+        with open(args.config, "r") as f:
+            base_config = yaml.safe_load(f)
+        with open(args.write_config, "w") as f:
+            yaml.safe_dump(fixture_config(base_config, args.host, args.port), f, sort_keys=False)
+        print(f"Wrote fixture config to {args.write_config}")
+
+    server = serve(args.host, args.port, args.latency)
+    print(f"Serving canned SERPs on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
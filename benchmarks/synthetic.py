@@ -0,0 +1,87 @@
+"""
+Seeded generators of synthetic SERP data shared by the benchmarks: ranked URL lists with a
+controlled overlap against a baseline, realistic URL shapes (www / trailing slashes / query
+strings / fragments / Bing `ck/a` redirects), and whole multi-engine result sets.
+"""
+import base64
+import random
+
+# URL shape -> relative frequency
+DEFAULT_SHAPES = {"plain": 0.5, "www": 0.2, "query": 0.15, "fragment": 0.05, "bing_redirect": 0.1}
+
+
+def bing_redirect(url):
+    """Wraps `url` the way Bing's tracking links do (`u=a1<base64 without padding>`)."""
+    encoded = base64.urlsafe_b64encode(url.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"https://www.bing.com/ck/a?!&&p=abc&u=a1{encoded}&ntb=1"
+
+
+def url_pool(pool_size=50000, hosts=997):
+    """Canonical destination URLs; `hosts` controls how many share a domain."""
+    return [f"https://site{i % hosts}.com/page/{i}" for i in range(pool_size)]
+
+
+def shape_url(url, shape, rng):
+    """
+    One raw spelling of a canonical URL. normalize_url maps every shape back to the same form,
+    except `bing_redirect`, which needs decode_bing_redirect first (as BingEngine.process_link does).
+    """
+    if shape == "www":
+        return url.replace("https://", "https://www.", 1) + "/"
+    if shape == "query":
+        return f"{url}?utm_source=serp&id={rng.randint(0, 9999)}"
+    if shape == "fragment":
+        return f"{url}/#section-{rng.randint(0, 9)}"
+    if shape == "bing_redirect":
+        return bing_redirect(url)
+    return url
+
+
+def raw_urls(n, pool_size=50000, shapes=None, seed=0):
+    """`n` raw URLs drawn from the pool, each in a shape drawn from `shapes`."""
+    rng = random.Random(seed)
+    shapes = shapes or DEFAULT_SHAPES
+    names, weights = list(shapes), list(shapes.values())
+    pool = url_pool(pool_size)
+    return [shape_url(rng.choice(pool), rng.choices(names, weights)[0], rng) for _ in range(n)]
+
+
+def make_lists(n_queries, depth=10, pool_size=50000, overlap=0.4, seed=0):
+    """(baselines, targets): each target keeps a baseline URL with probability `overlap`, in shuffled order."""
+    rng = random.Random(seed)
+    pool = [f"https://www.site{i % 997}.com/page/{i}/" for i in range(pool_size)]
+    baselines, targets = [], []
+    for _ in range(n_queries):
+        base = rng.sample(pool, depth)
+        target = [u if rng.random() < overlap else rng.choice(pool) for u in base]
+        rng.shuffle(target)
+        baselines.append(base)
+        targets.append(target)
+    return baselines, targets
+
+
+def make_result_set(n_queries, engines=("Bing", "Yahoo!"), depth=10, pool_size=50000, overlap=0.4,
+                    shapes=None, seed=0):
+    """
+    {engine: {query: ranked URLs}} with a "Google" baseline. Target engines share about
+    `overlap` of each baseline list and may return shorter lists. `bing_redirect` links are kept
+    undecoded, like ones a scraper failed to decode, so evaluations also cover URLs that
+    normalize to the same `bing.com/ck/a` form.
+    """
+    rng = random.Random(seed)
+    shapes = shapes or DEFAULT_SHAPES
+    names, weights = list(shapes), list(shapes.values())
+    pool = url_pool(pool_size)
+    shape = lambda url: shape_url(url, rng.choices(names, weights)[0], rng)
+
+    results = {"Google": {}}
+    results.update({engine: {} for engine in engines})
+    for q in range(n_queries):
+        query = f"synthetic query {q}"
+        base = rng.sample(pool, depth)
+        results["Google"][query] = [shape(u) for u in base]
+        for engine in engines:
+            target = [u if rng.random() < overlap else rng.choice(pool) for u in base]
+            rng.shuffle(target)
+            results[engine][query] = [shape(u) for u in target[:rng.randint(depth // 2, depth)]]
+    return results
@@ -9,10 +9,8 @@ from datetime import datetime
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
-from src.scraper.driver import setup_driver
-from src.scraper import GoogleEngine, BingEngine, YahooEngine
-from src.evaluation import Evaluator
-from src.utils.io_utils import read_queries_set, add_query_result
+# Task dependencies (selenium, pandas, scipy, matplotlib, ...) are imported inside each task,
+# so a run only pays for the subsystems it uses
 
 # Setup Logging
 logging.basicConfig(
@@ -33,17 +31,67 @@ def resolve_path(path):
         return path
     return os.path.join(PROJECT_ROOT, path)
 
-def run_scraper(config, limit=None):
+def dump_instrumentation(output_dir):
+    """Logs and writes the spans/counters collected by the task that just ran (if --instrument is on)."""
+    from src.utils import instrumentation
+    if not instrumentation.REGISTRY.enabled:
+        return
+    for line in instrumentation.REGISTRY.summary_lines():
+        logging.info(f"[METRICS] {line}")
+    os.makedirs(output_dir, exist_ok=True)
+    json_path, prom_path = instrumentation.REGISTRY.dump(os.path.join(output_dir, "instrumentation"))
+    logging.info(f"Instrumentation written to {json_path} and {prom_path}")
+    instrumentation.REGISTRY.reset()
+
+def build_engines(config, limit, snapshots=None, captcha_solver=None, rates=None):
+    """
+    Engines by name; each compiles the global link filter with its own overrides and paces
+    itself from `rates` (learned requests/s) when it has one.
+    """
+    from src.scraper import GoogleEngine, BingEngine, YahooEngine, LinkFilter, AdaptivePacer
+    min_delay, max_delay = config['experiment']['min_delay'], config['experiment']['max_delay']
+
+    def make_engine(engine_cls, name):
+        engine_cfg = config['search_engines'][name]
+        link_filter = LinkFilter.from_config(config.get('link_filter'), engine_cfg.get('link_filter'))
+        pacer = AdaptivePacer.from_config(config['experiment'].get('pacing'), min_delay, max_delay,
+                                          (rates or {}).get(name))
+        return engine_cls(engine_cfg, limit, min_delay, max_delay, link_filter=link_filter, snapshots=snapshots,
+                          captcha_solver=captcha_solver, pacer=pacer)
+
+    return {
+        "Google": make_engine(GoogleEngine, "Google"),
+        "Bing": make_engine(BingEngine, "Bing"),
+        "Yahoo!": make_engine(YahooEngine, "Yahoo!")
+    }
+
+def run_scraper(config, limit=None, resume_dir=None, snapshots=False, interactive_captcha=False):
+    from src.scraper import setup_driver, DriverPool, ScrapeScheduler, HTTPSearchBackend, RetryPolicy
+    from src.scraper.base_engine import prompt_captcha_solve
+    from src.scraper.pacing import load_rates, save_rates
+    from src.utils.snapshot_store import SnapshotStore
+    from src.utils.io_utils import read_queries_set, add_query_result, load_completed_queries
+    from src.utils.progress import ProgressTracker
+    from src.utils.results_store import close_results_stores, DEFAULT_BACKEND
+
     logging.info("Starting Scraper...")
     
     # Override limit if provided in args
     cfg_limit = limit if limit else config['experiment']['limit']
     
-    timestamp = datetime.now().strftime(config['experiment']['timestamp_format'])
-    
-    # Resolve output directory
-    output_base_dir = resolve_path(config['paths']['output_task1'])
-    output_dir = os.path.join(output_base_dir, timestamp)
+    if resume_dir:
+        # Continue writing into an existing run directory
+        output_dir = resolve_path(resume_dir)
+        if not os.path.isdir(output_dir):
+            logging.error(f"Run directory to resume not found: {output_dir}")
+            return
+        logging.info(f"Resuming run in: {output_dir}")
+    else:
+        timestamp = datetime.now().strftime(config['experiment']['timestamp_format'])
+
+        # Resolve output directory
+        output_base_dir = resolve_path(config['paths']['output_task1'])
+        output_dir = os.path.join(output_base_dir, timestamp)
     
     # Resolve assets directory
     assets_dir = resolve_path(config['paths']['assets'])
@@ -51,57 +99,188 @@ def run_scraper(config, limit=None):
     
     queries = read_queries_set(queries_file)
     
-    # Initialize Engines
-    engines = {
-        "Google": GoogleEngine(config['search_engines']['Google'], cfg_limit, config['experiment']['min_delay'], config['experiment']['max_delay']),
-        "Bing": BingEngine(config['search_engines']['Bing'], cfg_limit, config['experiment']['min_delay'], config['experiment']['max_delay']),
-        "Yahoo!": YahooEngine(config['search_engines']['Yahoo!'], cfg_limit, config['experiment']['min_delay'], config['experiment']['max_delay'])
-    }
+    # Raw pages are archived under the run directory's name, so `--task reextract` can replay them
+    snapshot_store = None
+    if snapshots or config['experiment'].get('snapshots', False):
+        snapshot_store = SnapshotStore(resolve_path(config['paths']['snapshots']), run=os.path.basename(output_dir))
+        logging.info(f"Archiving raw pages to {snapshot_store.root} (run {snapshot_store.run})")
+
+    # CAPTCHAs are retried with backoff; solving them by hand is opt-in and needs a terminal
+    captcha_cfg = config['experiment'].get('captcha', {})
+    captcha_solver = None
+    if interactive_captcha or captcha_cfg.get('interactive', False):
+        if sys.stdin.isatty():
+            captcha_solver = prompt_captcha_solve
+        else:
+            logging.warning("Interactive CAPTCHA solving needs a terminal; blocked queries will be retried instead.")
+
+    # Each engine starts at the rate it last ran at safely
+    pacing_state = resolve_path(config['paths'].get('pacing_state', "output/pacing_state.json"))
+    rates = load_rates(pacing_state)
+    engines = build_engines(config, cfg_limit, snapshot_store, captcha_solver, rates)
+    for name, engine in engines.items():
+        logging.info(f"[{name}] Starting at {engine.pacer.rate:.3f} requests/s"
+                     f"{' (learned)' if name in rates else ''}.")
     
-    driver = setup_driver(config['experiment']['headless_mode'], config['experiment']['user_agent'])
+    # (engine -> completed queries) index, built with one pass over each store
+    pending = {}
+    for engine_name in engines:
+        completed = load_completed_queries(output_dir, engine_name) if resume_dir else set()
+        pending[engine_name] = [q for q in queries if q not in completed]
+        if resume_dir:
+            logging.info(f"[{engine_name}] {len(completed)} queries already done, {len(pending[engine_name])} remaining.")
+    progress = ProgressTracker(sum(len(p) for p in pending.values()))
+
+    backend = config['experiment'].get('results_backend', DEFAULT_BACKEND)
+
+    def on_result(engine_name, query, results):
+        add_query_result(output_dir, engine_name, query, results, backend)
+        progress.update()
+        logging.info(f"Overall progress: {progress.format()}")
+
+    # Engines run in parallel, sharing a pool of browser instances
+    browser_profile = dict(config['experiment'].get('browser', {}))
+    if browser_profile.get('disk_cache_dir'):
+        browser_profile['disk_cache_dir'] = resolve_path(browser_profile['disk_cache_dir'])
+    pool = DriverPool(config['experiment'].get('driver_pool_size', 1),
+                      lambda slot: setup_driver(config['experiment']['headless_mode'], config['experiment']['user_agent'],
+                                                browser_profile, slot),
+                      recycle_after=browser_profile.get('recycle_after'))
+    concurrency = {name: config['search_engines'][name].get('concurrency', 1) for name in engines}
+    scheduler = ScrapeScheduler(engines, pool, concurrency, on_result, RetryPolicy.from_config(captcha_cfg))
 
     try:
-        for engine_name, engine in engines.items():
-            logging.info(f"--- SWITCHING TO ENGINE: {engine_name} ---")
-            
-            for idx, query in enumerate(queries):
-                logging.info(f"[{idx + 1}/{len(queries)}] Searching {engine_name}: {query}")
-                
-                results = engine.search(query, driver)
-                add_query_result(output_dir, engine_name, query, results)
-                
-                logging.info(f"Found {len(results)} links.")
-                
+        if config['experiment'].get('fetch_mode', 'browser') == 'http':
+            # Plain HTTP first; only pages that need JavaScript or are blocked go to the browser
+            http_backend = HTTPSearchBackend(engines, concurrency, config['experiment']['user_agent'])
+            pending = http_backend.run(pending, on_result)
+            logging.info(f"{sum(len(q) for q in pending.values())} queries need the browser fallback.")
+        scheduler.run(pending)
+        for engine_name, queries in scheduler.abandoned.items():
+            logging.warning(f"[{engine_name}] {len(queries)} queries stayed blocked. Retry them with: --resume {output_dir}")
     except KeyboardInterrupt:
-        logging.info("Scraper interrupted.")
+        logging.info(f"Scraper interrupted. Resume with: --resume {output_dir}")
     finally:
-        driver.quit()
+        close_results_stores()
+        pool.close()
+        save_rates(pacing_state, {name: engine.pacer for name, engine in engines.items()})
+        if snapshot_store is not None:
+            snapshot_store.close()
+        dump_instrumentation(output_dir)
         logging.info("Scraping Done.")
 
-def run_evaluation(config):
+def run_reextract(config, limit=None, run=None, workers=1):
+    from src.scraper.reextract import reextract_run, SKIPPED_STATUSES
+    from src.utils.io_utils import add_query_result
+    from src.utils.results_store import close_results_stores, DEFAULT_BACKEND
+    from src.utils.snapshot_store import SnapshotStore
+
+    logging.info("Starting Re-extraction...")
+    store = SnapshotStore(resolve_path(config['paths']['snapshots']))
+    runs = store.runs()
+    if not runs:
+        logging.error(f"No archived pages in {store.root}; scrape with --snapshots first.")
+        return
+    run = run or runs[-1]
+    if run not in runs:
+        logging.error(f"Run {run} is not in the snapshot archive (archived runs: {', '.join(runs)})")
+        return
+
+    # Results go to a fresh run directory, next to the original scrape
+    timestamp = datetime.now().strftime(config['experiment']['timestamp_format'])
+    output_dir = os.path.join(resolve_path(config['paths']['output_task1']), timestamp)
+    logging.info(f"Re-extracting run {run} into: {output_dir}")
+
+    engines = build_engines(config, limit if limit else config['experiment']['limit'])
+    backend = config['experiment'].get('results_backend', DEFAULT_BACKEND)
+
+    def on_result(engine_name, query, results):
+        add_query_result(output_dir, engine_name, query, results, backend)
+
+    try:
+        statuses = reextract_run(engines, store, run, on_result, workers)
+        for engine_name, counts in statuses.items():
+            logging.info(f"[{engine_name}] " + ", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+        if any(counts[status] for counts in statuses.values() for status in SKIPPED_STATUSES):
+            logging.warning(f"Blocked or missing pages were skipped. Scrape them with: --resume {output_dir}")
+    finally:
+        close_results_stores()
+        store.close()
+        dump_instrumentation(output_dir)
+        logging.info("Re-extraction Done.")
+
+def run_evaluation(config, stream=False, chunk_size=10000, workers=1, use_cache=True, output_format="csv",
+                   with_url_ids=False, plots=None, draft_plots=False, cv_folds=5, cv_repeats=10, engine_matrix=False,
+                   permutations=10000, correction="holm"):
+    from src.evaluation import Evaluator
+    from src.visualization.plots import DEFAULT_DPI, DRAFT_DPI
+
     logging.info("Starting Evaluation...")
     
     task1_dir = resolve_path(config['paths']['output_task1'])
     task2_dir = resolve_path(config['paths']['output_task2'])
+    metric_cache = config['paths'].get('metric_cache')
+    metric_cache = resolve_path(metric_cache) if metric_cache and use_cache else None
+    evaluation = config.get('evaluation', {})
     
-    evaluator = Evaluator(task1_dir, task2_dir)
+    evaluator = Evaluator(task1_dir, task2_dir, streaming=stream, chunk_size=chunk_size, workers=workers,
+                          metric_cache=metric_cache, output_format=output_format, with_url_ids=with_url_ids,
+                          plots=plots, plot_dpi=DRAFT_DPI if draft_plots else DEFAULT_DPI,
+                          cv_folds=cv_folds, cv_repeats=cv_repeats, engines=list(config['search_engines']),
+                          baseline=evaluation.get('baseline', "Google"),
+                          engine_matrix=engine_matrix or evaluation.get('engine_matrix', False),
+                          permutations=permutations, correction=correction)
     evaluator.run()
+    dump_instrumentation(task2_dir)
     logging.info("Evaluation Done.")
 
 if __name__ == "__main__":
     default_config = os.path.join(PROJECT_ROOT, "config", "experiment.yaml")
 
     parser = argparse.ArgumentParser(description="SearchRank Analytics Engine Experiment Runner")
-    parser.add_argument("--task", choices=["scrape", "evaluate", "all"], default="all", help="Task to run")
+    parser.add_argument("--task", choices=["scrape", "reextract", "evaluate", "all"], default="all", help="Task to run")
     parser.add_argument("--config", default=default_config, help="Path to configuration file")
     parser.add_argument("--limit", type=int, help="Limit number of results per query (overrides config)")
+    parser.add_argument("--stream", action="store_true", help="Evaluate in bounded memory, streaming results chunk by chunk")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Queries per chunk in streaming evaluation")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used for metric computation during evaluation and for re-extraction")
+    parser.add_argument("--no-metric-cache", action="store_true", help="Recompute every metric instead of reusing cached rows")
+    parser.add_argument("--output-format", choices=["csv", "parquet", "arrow"], default="csv", help="Format of the per-query evaluation results")
+    parser.add_argument("--with-url-ids", action="store_true", help="Store ranked URL ID lists next to the metrics (parquet/arrow only)")
+    parser.add_argument("--plots", default="all", help="Plots to render: all, none or a comma-separated list of plot names")
+    parser.add_argument("--draft-plots", action="store_true", help="Render plots at draft resolution (72 dpi)")
+    parser.add_argument("--cv-folds", type=int, default=5, help="Folds per repeat in the cross-validation stability analysis")
+    parser.add_argument("--cv-repeats", type=int, default=10, help="Shuffled repeats of the k-fold cross-validation")
+    parser.add_argument("--permutations", type=int, default=10000, help="Sign flips per paired permutation test (0 disables them)")
+    parser.add_argument("--correction", choices=["holm", "bh", "none"], default="holm", help="Multiple-comparison correction of the permutation tests")
+    parser.add_argument("--engine-matrix", action="store_true", help="Also score every engine against every other engine as baseline")
+    parser.add_argument("--instrument", action="store_true", help="Record timing spans and counters; dumped as JSON and Prometheus text")
+    parser.add_argument("--resume", metavar="RUN_DIR", help="Resume an interrupted scrape in an existing task1 run directory")
+    parser.add_argument("--interactive-captcha", action="store_true", help="Pause a blocked worker until the CAPTCHA is solved by hand (needs a terminal)")
+    parser.add_argument("--snapshots", action="store_true", help="Archive the raw HTML of every scraped page (see --task reextract)")
+    parser.add_argument("--snapshot-run", metavar="RUN", help="Archived run to re-extract (default: the latest one)")
     
     args = parser.parse_args()
+    plots = None
+    if args.task in ["evaluate", "all"]:
+        from src.visualization.plots import parse_plot_selection
+        try:
+            plots = parse_plot_selection(args.plots)
+        except ValueError as e:
+            parser.error(str(e))
     
     config = load_config(args.config)
+    if args.instrument:
+        from src.utils import instrumentation
+        instrumentation.enable()
     
     if args.task in ["scrape", "all"]:
-        run_scraper(config, args.limit)
+        run_scraper(config, args.limit, args.resume, args.snapshots, args.interactive_captcha)
+
+    if args.task == "reextract":
+        run_reextract(config, args.limit, args.snapshot_run, args.workers)
         
     if args.task in ["evaluate", "all"]:
-        run_evaluation(config)
+        run_evaluation(config, args.stream, args.chunk_size, args.workers, not args.no_metric_cache,
+                       args.output_format, args.with_url_ids, plots, args.draft_plots, args.cv_folds, args.cv_repeats,
+                       args.engine_matrix, args.permutations, args.correction)
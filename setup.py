@@ -12,8 +12,13 @@ setup(
         "matplotlib",
         "seaborn",
         "scipy",
-        "scikit-learn",
-        "pyyaml"
+        "pyyaml",
+        "aiohttp",
+        "lxml",
+        "cssselect"
     ],
+    extras_require={
+        "columnar": ["pyarrow"],
+    },
     python_requires=">=3.8",
 )
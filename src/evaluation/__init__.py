@@ -1,3 +1,14 @@
-from .evaluator import Evaluator
-from .bootstrap import bootstrap_ci
-from .cross_validation import run_cross_validation
+from src.utils.lazy import lazy_exports
+
+# Public name -> submodule
+_EXPORTS = {
+    "Evaluator": ".evaluator",
+    "EngineMatrix": ".engine_matrix",
+    "bootstrap_ci": ".bootstrap",
+    "bootstrap_intervals": ".bootstrap",
+    "paired_bootstrap": ".bootstrap",
+    "repeated_kfold": ".cross_validation",
+    "run_cross_validation": ".cross_validation",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
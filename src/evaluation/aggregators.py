@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class RunningStats:
+    """
+    Per-column count, mean and variance over streamed rows, NaNs skipped per column.
+    Chunks are folded in with the parallel (Chan et al.) update, so instances can also be merged.
+    """
+
+    def __init__(self, n_cols: int):
+        self.count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0).astype(float)
+        safe = np.maximum(count, 1)
+        mean = np.where(valid, values, 0.0).sum(axis=0) / safe
+        m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+        self._combine(count, mean, m2)
+
+    def merge(self, other: "RunningStats"):
+        self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        safe = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe
+        self.count = total
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), NaN where fewer than two values were seen."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def means(self):
+        return np.where(self.count > 0, self.mean, np.nan)
+
+
+class HistogramSketch:
+    """
+    Fixed-range histogram used as a mergeable quantile sketch for bounded metrics.
+    Quantile error is at most one bin width ((hi - lo) / bins).
+    """
+
+    def __init__(self, lo: float, hi: float, bins: int = 2048):
+        self.lo = lo
+        self.hi = hi
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = np.clip(values[~np.isnan(values)], self.lo, self.hi)
+        idx = np.minimum(((values - self.lo) / (self.hi - self.lo) * len(self.counts)).astype(np.int64),
+                         len(self.counts) - 1)
+        self.counts += np.bincount(idx, minlength=len(self.counts))
+
+    def merge(self, other: "HistogramSketch"):
+        self.counts += other.counts
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def quantiles(self, qs):
+        """Quantiles by linear interpolation inside the bin holding each rank."""
+        qs = np.asarray(qs, dtype=float)
+        if self.total == 0:
+            return np.full(qs.shape, np.nan)
+        cum = np.concatenate([[0], np.cumsum(self.counts)])
+        return np.interp(qs * self.total, cum, self.edges)
+
+    def quantile_sample(self, n: int = 1000):
+        """`n` values at evenly spaced quantiles: a stand-in sample with the sketched distribution."""
+        if self.total == 0:
+            return np.array([])
+        return self.quantiles((np.arange(n) + 0.5) / n)
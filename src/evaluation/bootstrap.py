@@ -1,12 +1,137 @@
+from statistics import NormalDist
 import numpy as np
 
-def bootstrap_ci(data, n_bootstraps=1000, ci=95):
+# Upper bound on the number of resample weights (n_bootstraps x n_queries) held in memory at once
+MAX_CHUNK_ELEMENTS = 1 << 22
+
+
+def _resample_means(matrix, n_bootstraps, rng, max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Means of every column of `matrix` (queries x series) under n_bootstraps shared resamples.
+    Each chunk draws its index matrix once and turns it into per-query counts, so every
+    series sees the same resampled queries and the means come from one matrix product.
+    """
+    n = matrix.shape[0]
+    chunk = max(1, min(n_bootstraps, max_elements // n))
+    boot_means = np.empty((n_bootstraps, matrix.shape[1]))
+
+    for start in range(0, n_bootstraps, chunk):
+        size = min(chunk, n_bootstraps - start)
+        idx = rng.integers(0, n, size=(size, n))
+        offsets = (idx + np.arange(size)[:, None] * n).ravel()
+        counts = np.bincount(offsets, minlength=size * n).reshape(size, n)
+        boot_means[start:start + size] = counts @ matrix / n
+
+    return boot_means
+
+
+def _bca_bounds(matrix, boot_means, alpha):
+    """Bias-corrected and accelerated percentile levels for each column (the statistic is the mean)."""
+    n = matrix.shape[0]
+    normal = NormalDist()
+    observed = matrix.mean(axis=0)
+    jackknife = (matrix.sum(axis=0) - matrix) / (n - 1)
+    jk_dev = jackknife.mean(axis=0) - jackknife
+
+    lower_pct, upper_pct = [], []
+    for j in range(matrix.shape[1]):
+        prop = np.mean(boot_means[:, j] < observed[j])
+        prop = min(max(prop, 1.0 / (len(boot_means) + 1)), 1 - 1.0 / (len(boot_means) + 1))
+        z0 = normal.inv_cdf(prop)
+
+        denom = 6.0 * np.sum(jk_dev[:, j] ** 2) ** 1.5
+        accel = np.sum(jk_dev[:, j] ** 3) / denom if denom > 0 else 0.0
+
+        bounds = []
+        for z_alpha in (normal.inv_cdf(alpha), normal.inv_cdf(1 - alpha)):
+            adjusted = z0 + (z0 + z_alpha) / (1 - accel * (z0 + z_alpha))
+            bounds.append(100 * normal.cdf(adjusted))
+        lower_pct.append(bounds[0])
+        upper_pct.append(bounds[1])
+
+    return lower_pct, upper_pct
+
+
+def bootstrap_intervals(scores, n_bootstraps=1000, ci=95, method="percentile", seed=None,
+                        max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Bootstrap CIs for the mean of several query-aligned score series from one shared resample.
+    `scores` maps a key (e.g. (engine, metric)) to a 1D array; all arrays must be aligned by query.
+    `method` is "percentile" or "bca". Returns {key: (lower, mean, upper)}.
+    """
+    if method not in ("percentile", "bca"):
+        raise ValueError(f"Unknown bootstrap method: {method}")
+
+    keys = list(scores.keys())
+    matrix = np.column_stack([np.asarray(scores[k], dtype=float) for k in keys])
+    if matrix.shape[0] < 2:
+        return {k: (0.0, 0.0, 0.0) for k in keys}
+
+    rng = np.random.default_rng(seed)
+    boot_means = _resample_means(matrix, n_bootstraps, rng, max_elements)
+
+    alpha = (100 - ci) / 200
+    if method == "bca" and not np.isnan(matrix).any():
+        lower_pct, upper_pct = _bca_bounds(matrix, boot_means, alpha)
+    else:
+        lower_pct = [100 * alpha] * len(keys)
+        upper_pct = [100 * (1 - alpha)] * len(keys)
+
+    results = {}
+    for j, key in enumerate(keys):
+        lower = np.percentile(boot_means[:, j], lower_pct[j])
+        upper = np.percentile(boot_means[:, j], upper_pct[j])
+        results[key] = (float(lower), float(np.mean(boot_means[:, j])), float(upper))
+    return results
+
+
+def paired_bootstrap(scores, pairs, n_bootstraps=1000, ci=95, method="percentile", seed=None,
+                     max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Bootstrap CIs for every series in `scores` plus the paired differences listed in `pairs`
+    ((key_a, key_b) tuples). Differences use the same resampled queries as the series they
+    compare, so their intervals account for the pairing. Difference results are keyed by the pair.
+    """
+    series = dict(scores)
+    for key_a, key_b in pairs:
+        series[(key_a, key_b)] = np.asarray(scores[key_a], dtype=float) - np.asarray(scores[key_b], dtype=float)
+    return bootstrap_intervals(series, n_bootstraps, ci, method, seed, max_elements)
+
+
+def bootstrap_ci(data, n_bootstraps=1000, ci=95, method="percentile", seed=None):
     if len(data) < 2: return 0.0, 0.0, 0.0
-    boot_means = []
-    data_array = np.array(data)
-    for _ in range(n_bootstraps):
-        sample = np.random.choice(data_array, size=len(data_array), replace=True)
-        boot_means.append(np.mean(sample))
-    lower = np.percentile(boot_means, (100 - ci) / 2)
-    upper = np.percentile(boot_means, 100 - (100 - ci) / 2)
-    return float(lower), float(np.mean(boot_means)), float(upper)
+    return bootstrap_intervals({"data": data}, n_bootstraps, ci, method, seed)["data"]
+
+
+class PoissonBootstrap:
+    """
+    Streaming bootstrap of means: every row gets an independent Poisson(1) weight per
+    replicate, so replicate sums accumulate chunk by chunk in O(n_bootstraps x series) memory.
+    """
+
+    def __init__(self, n_series: int, n_bootstraps: int = 1000, seed=None, max_elements=1 << 20):
+        self.n_bootstraps = n_bootstraps
+        self.max_elements = max_elements
+        self.rng = np.random.default_rng(seed)
+        self.sums = np.zeros((n_bootstraps, n_series))
+        self.weights = np.zeros((n_bootstraps, n_series))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        rows = max(1, self.max_elements // self.n_bootstraps)
+        for start in range(0, len(values), rows):
+            block = slice(start, start + rows)
+            w = self.rng.poisson(1.0, size=(self.n_bootstraps, len(filled[block]))).astype(float)
+            self.sums += w @ filled[block]
+            self.weights += w @ valid[block]
+
+    def intervals(self, ci=95):
+        """(lower, mean, upper) of the replicate means for every series."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.sums / self.weights
+        alpha = (100 - ci) / 2
+        lower = np.nanpercentile(means, alpha, axis=0)
+        upper = np.nanpercentile(means, 100 - alpha, axis=0)
+        return [(float(lo), float(m), float(hi)) for lo, m, hi in zip(lower, np.nanmean(means, axis=0), upper)]
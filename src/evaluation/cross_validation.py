@@ -1,16 +1,165 @@
 import numpy as np
-from sklearn.model_selection import KFold
+import pandas as pd
 
-def run_cross_validation(df, engine, k_folds=5):
+# Upper bound on fold-membership entries (repeats x queries) held in memory at once
+MAX_CHUNK_ELEMENTS = 1 << 22
+
+
+def fold_labels(n, k_folds, repeats, rng):
+    """
+    (n, repeats) fold-assignment matrix: each column is an independent shuffle of k near-equal
+    folds (the first n % k folds get one more query, as in KFold).
+    """
+    sizes = np.full(k_folds, n // k_folds)
+    sizes[:n % k_folds] += 1
+    labels = np.repeat(np.arange(k_folds, dtype=np.int32), sizes)
+    return rng.permuted(np.tile(labels, (repeats, 1)), axis=1).T
+
+
+def _moment_columns(values):
+    """[values, values^2, valid] side by side, with NaNs zeroed, so one product yields every fold moment."""
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    return np.hstack([filled, filled * filled, valid.astype(float)])
+
+
+def _fold_moments(labels, columns, k_folds):
+    """
+    (repeats, k_folds, columns) sums of `columns` over the folds in `labels` (queries x repeats).
+    The labels are used directly as the row indices of a sparse (repeat, fold) x query membership
+    matrix, so every fold of every column comes from one sparse-dense product that reads the
+    queries in order.
+    """
+    from scipy.sparse import csc_matrix
+    n, repeats = labels.shape
+    rows = (labels + np.arange(repeats, dtype=labels.dtype) * k_folds).ravel()
+    membership = csc_matrix((np.ones(n * repeats), rows, np.arange(0, n * repeats + 1, repeats)),
+                            shape=(repeats * k_folds, n))
+    return (membership @ columns).reshape(repeats, k_folds, -1)
+
+
+def repeated_kfold_moments(values, k_folds=5, repeats=10, seed=None, max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Per-fold [sum, sum of squares, count] of every column of `values` (queries x series) under
+    `repeats` shuffled k-fold splits, shape (repeats, k_folds, 3 x series). Repeats are processed
+    in chunks of at most `max_elements` fold labels.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[0]
+    columns = _moment_columns(values)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, min(repeats, max_elements // max(n, 1)))
+
+    moments = np.empty((repeats, k_folds, columns.shape[1]))
+    for start in range(0, repeats, chunk):
+        size = min(chunk, repeats - start)
+        moments[start:start + size] = _fold_moments(fold_labels(n, k_folds, size, rng), columns, k_folds)
+    return moments
+
+
+class StabilityResult:
+    """
+    Repeated k-fold statistics of several query-aligned series. Arrays are indexed
+    (repeat, fold, series) and `keys` names the series (e.g. (engine, metric)). Test folds
+    are the held-out queries; the train side of each split is everything else.
+    """
+
+    def __init__(self, keys, moments):
+        self.keys = list(keys)
+        m = len(self.keys)
+        sums, squares, counts = moments[..., :m], moments[..., m:2 * m], moments[..., 2 * m:]
+        total_sums, total_counts = sums[0].sum(axis=0), counts[0].sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.fold_means = sums / counts
+            self.fold_vars = np.maximum(squares / counts - self.fold_means ** 2, 0.0)
+            self.train_means = (total_sums - sums) / (total_counts - counts)
+        self.fold_counts = counts
+
+    @property
+    def repeats(self):
+        return self.fold_means.shape[0]
+
+    @property
+    def k_folds(self):
+        return self.fold_means.shape[1]
+
+    def fold_std(self):
+        """Spread of the test-fold means within each repeat, shape (repeats, series)."""
+        return np.nanstd(self.fold_means, axis=1)
+
+    def summary(self):
+        """
+        One row per series: mean of the fold means, fold-to-fold std (averaged over repeats,
+        with its spread across repeats) and the largest train/test gap of any split.
+        """
+        with np.errstate(invalid="ignore"):
+            fold_std = self.fold_std()
+            gap = np.nanmax(np.abs(self.fold_means - self.train_means), axis=(0, 1))
+        index = pd.MultiIndex.from_tuples(self.keys) if isinstance(self.keys[0], tuple) else pd.Index(self.keys)
+        return pd.DataFrame({
+            "Mean": np.nanmean(self.fold_means, axis=(0, 1)),
+            "Fold Std": np.nanmean(fold_std, axis=0),
+            "Fold Std SD": np.nanstd(fold_std, axis=0),
+            "Max Train/Test Gap": gap,
+        }, index=index)
+
+    def describe(self, key, summary=None):
+        """Log line for one series (`summary` is a precomputed summary(), when describing several)."""
+        row = (self.summary() if summary is None else summary).loc[key]
+        return (f"Mean {key[-1] if isinstance(key, tuple) else key}: {row['Mean']:.3f} "
+                f"(Std: {row['Fold Std']:.3f} +/- {row['Fold Std SD']:.3f} over {self.repeats}x{self.k_folds} folds, "
+                f"max train/test gap {row['Max Train/Test Gap']:.3f})")
+
+
+def repeated_kfold(scores, k_folds=5, repeats=10, seed=None, max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Repeated k-fold stability of several query-aligned score series from one set of shared
+    splits. `scores` maps a key (e.g. (engine, metric)) to a 1D array, like bootstrap_intervals.
+    """
+    keys = list(scores.keys())
+    matrix = np.column_stack([np.asarray(scores[k], dtype=float) for k in keys])
+    if matrix.shape[0] < k_folds:
+        return None
+    return StabilityResult(keys, repeated_kfold_moments(matrix, k_folds, repeats, seed, max_elements))
+
+
+def run_cross_validation(df, engine, k_folds=5, metric="MAP", repeats=1, seed=42):
     """Runs k-fold cross-validation on the queries to test metric stability."""
     subset = df[df["Engine"] == engine]
-    if len(subset) < k_folds: return "Not enough data"
+    result = repeated_kfold({metric: subset[metric].to_numpy()}, k_folds, repeats, seed)
+    if result is None: return "Not enough data"
+    return result.describe(metric)
+
+
+# Odd 64-bit constants mixing a query key and a repeat number into a fold
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_HASH_SALT = np.uint64(0xBF58476D1CE4E5B9)
+
+
+class StreamingKFold:
+    """
+    Repeated k-fold stability check over streamed rows: each query is assigned to a fold of
+    every repeat by a stable hash of its key, and per-fold moments are kept instead of the rows.
+    """
+
+    def __init__(self, keys, k_folds=5, repeats=1):
+        self.keys = list(keys)
+        self.k_folds = k_folds
+        self.repeats = repeats
+        self.moments = np.zeros((repeats, k_folds, 3 * len(self.keys)))
 
-    kf = KFold(n_splits=k_folds, shuffle=True, random_state=42)
-    map_scores = []
+    def folds(self, query_keys):
+        """(n, repeats) fold of every query in every repeat."""
+        keys = np.asarray(query_keys, dtype=np.int64).view(np.uint64)
+        salts = np.arange(self.repeats, dtype=np.uint64) * _HASH_SALT
+        mixed = (keys[:, None] ^ salts) * _HASH_MULTIPLIER
+        return ((mixed >> np.uint64(32)) % np.uint64(self.k_folds)).astype(np.int32)
 
-    for train_index, test_index in kf.split(subset):
-        fold_data = subset.iloc[test_index]
-        map_scores.append(fold_data["MAP"].mean())
+    def update(self, query_keys, values):
+        """`values` is (n, series), with columns in the order of `keys`."""
+        columns = _moment_columns(np.asarray(values, dtype=float).reshape(len(query_keys), -1))
+        self.moments += _fold_moments(self.folds(query_keys), columns, self.k_folds)
 
-    return f"Mean MAP: {np.mean(map_scores):.3f} (Std: {np.std(map_scores):.3f})"
+    def result(self):
+        if self.moments[0, :, 2 * len(self.keys):].sum() < self.k_folds: return None
+        return StabilityResult(self.keys, self.moments)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from src.metrics.pairwise import EncodedLists, pairwise_metrics
+from src.utils.url_table import URLTable
+
+
+class EngineMatrix:
+    """
+    Every engine scored against every other as baseline: `values` is a float32
+    (baseline x engine x query x metric) tensor. Symmetric metrics (Jaccard, Spearman)
+    mirror across the engine axes; the diagonal is NaN.
+    """
+
+    def __init__(self, engines, queries, columns, values):
+        self.engines = list(engines)
+        self.queries = list(queries)
+        self.columns = list(columns)
+        self.values = values
+
+    @classmethod
+    def from_lists(cls, lists, queries, metric_columns, k=10, url_table=None):
+        """
+        `lists` maps each engine to its ranked URL lists aligned with `queries`; `metric_columns`
+        turns a compute_batch_metrics result into {column: per-query values}. Each engine's
+        lists are normalized, interned and turned into sets / rank maps exactly once.
+        """
+        url_table = url_table if url_table is not None else URLTable()
+        engines = list(lists)
+        encoded = {engine: EncodedLists([url_table.encode(urls) for urls in lists[engine]], k)
+                   for engine in engines}
+        pairs = {pair: metric_columns(metrics) for pair, metrics in pairwise_metrics(encoded).items()}
+        columns = list(next(iter(pairs.values()))) if pairs else []
+
+        values = np.full((len(engines), len(engines), len(queries), len(columns)), np.nan, dtype=np.float32)
+        for (a, b), table in pairs.items():
+            values[engines.index(a), engines.index(b)] = np.column_stack([table[col] for col in columns])
+        return cls(engines, queries, columns, values)
+
+    def means(self):
+        """(baseline x engine x metric) means over queries."""
+        with np.errstate(invalid="ignore"):
+            sums = np.nansum(self.values, axis=2, dtype=float)
+            counts = (~np.isnan(self.values)).sum(axis=2)
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def rows(self):
+        """Per-query rows flattened to (query, baseline x engine x metric), for running aggregators."""
+        return self.values.transpose(2, 0, 1, 3).reshape(len(self.queries), -1)
+
+    def save(self, path):
+        np.savez(path, values=self.values, engines=np.array(self.engines), queries=np.array(self.queries, dtype=str),
+                 columns=np.array(self.columns))
+
+
+def matrix_summary(engines, columns, means):
+    """Long-format means: one row per (baseline, engine) pair, one column per metric."""
+    index = pd.MultiIndex.from_product([engines, engines], names=["Baseline", "Engine"])
+    frame = pd.DataFrame(np.asarray(means).reshape(len(engines) ** 2, len(columns)), index=index, columns=columns)
+    return frame[frame.index.get_level_values(0) != frame.index.get_level_values(1)]
+
+
+def load_engine_matrix(path):
+    with np.load(path) as data:
+        return EngineMatrix(data["engines"].tolist(), data["queries"].tolist(), data["columns"].tolist(),
+                            data["values"])
@@ -1,32 +1,121 @@
-import pandas as pd
+import os
+import shutil
 import logging
+from collections import deque
+from itertools import combinations
+import numpy as np
+import pandas as pd
 from src.utils.io_utils import load_results, get_latest_results_dir
-from src.metrics.ranking_metrics import precision_at_k, recall_at_k, average_precision, ndcg_at_k
-from src.metrics.similarity_metrics import calculate_jaccard, robust_spearman
-from src.evaluation.cross_validation import run_cross_validation
-from src.evaluation.bootstrap import bootstrap_ci
-from src.visualization.plots import generate_plots
-from src.metrics.statistical_tests import run_t_test
+from src.utils import instrumentation
+from src.utils.results_store import has_results, iter_latest_results, query_key
+from src.metrics.batch_metrics import compute_batch_metrics
+from src.utils.url_table import URLTable
+from src.evaluation.cross_validation import repeated_kfold, StreamingKFold
+from src.evaluation.bootstrap import paired_bootstrap, PoissonBootstrap
+from src.evaluation.aggregators import RunningStats, HistogramSketch
+from src.evaluation.streaming import align_results, iter_chunks
+from src.evaluation.parallel import ShardedMetricPool
+from src.evaluation.metric_cache import MetricCache
+from src.evaluation.engine_matrix import EngineMatrix, matrix_summary
+from src.visualization.plots import generate_plots, DEFAULT_DPI
+from src.metrics.statistical_tests import (run_t_test, paired_t_test_from_moments, permutation_tests,
+                                           significance_table, SignFlipTest)
+
+DEFAULT_ENGINES = ["Google", "Bing", "Yahoo!"]
+BOOTSTRAP_SEED = 42
+CV_SEED = 42
+PERMUTATION_SEED = 42
+METRIC_COLUMNS = ["Overlap %", "Precision@10", "MAP", "NDCG@10", "Spearman Rho", "Jaccard"]
+# Value ranges for the streaming quantile sketches (NDCG can exceed 1 when a target repeats a URL)
+METRIC_RANGES = {"Overlap %": (0, 100), "Precision@10": (0, 1), "MAP": (0, 1),
+                 "NDCG@10": (0, 2), "Spearman Rho": (-1, 1), "Jaccard": (0, 1)}
+
+def metric_columns(metrics):
+    """{column: per-query values} for METRIC_COLUMNS from a compute_batch_metrics result."""
+    return {
+        "Overlap %": metrics["Jaccard"] * 100,
+        "Precision@10": metrics["P@k"][:, 9],
+        "MAP": metrics["AP"],
+        "NDCG@10": metrics["NDCG"],
+        "Spearman Rho": metrics["Spearman"],
+        "Jaccard": metrics["Jaccard"],
+    }
+
+def metrics_frame(engine, queries, metrics):
+    """Per-query evaluation rows for one engine from a compute_batch_metrics result."""
+    return pd.DataFrame({"Engine": engine, "Query": list(queries), **metric_columns(metrics)})
 
 class Evaluator:
-    def __init__(self, task1_output_dir, output_dir):
+    def __init__(self, task1_output_dir, output_dir, streaming=False, chunk_size=10000, workers=1,
+                 metric_cache=None, output_format="csv", with_url_ids=False, plots=None, plot_dpi=DEFAULT_DPI,
+                 cv_folds=5, cv_repeats=10, engines=None, baseline="Google", engine_matrix=False,
+                 permutations=10000, correction="holm"):
         self.task1_output_dir = task1_output_dir
         self.output_dir = output_dir
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.metric_cache = metric_cache
+        self.output_format = output_format
+        self.with_url_ids = with_url_ids
+        self.plots = plots
+        self.plot_dpi = plot_dpi
+        self.cv_folds = cv_folds
+        self.cv_repeats = cv_repeats
+        # Every other engine is scored against the baseline; engine_matrix also scores every pair
+        self.baseline = baseline
+        self.engines = [engine for engine in (engines or DEFAULT_ENGINES) if engine != baseline]
+        self.engine_matrix = engine_matrix
+        self.permutations = permutations
+        self.correction = correction
+        self.pool = None
+        self.cache = None
 
     def run(self):
+        # Metric work is sharded over a process pool when workers > 1; the output is identical to a serial run
+        if self.workers > 1:
+            self.pool = ShardedMetricPool(self.workers, shard_size=min(self.chunk_size, 5000))
+        # Rows whose normalized (baseline, target) lists were evaluated before are read from the metric cache
+        if self.metric_cache:
+            self.cache = MetricCache(self.metric_cache)
+        try:
+            return self._run()
+        finally:
+            if self.pool:
+                self.pool.close()
+                self.pool = None
+            if self.cache:
+                self.cache.log_stats()
+                self.cache.close()
+                self.cache = None
+
+    def _run(self):
         latest_dir = get_latest_results_dir(self.task1_output_dir)
         if not latest_dir:
             logging.error(f"No task1 results found in {self.task1_output_dir}")
             return
 
         logging.info(f"Evaluating results from: {latest_dir}")
-        google_data = load_results(latest_dir, "Google")
-        if not google_data:
-            logging.error("Google baseline data not found.")
+        if self.streaming:
+            return self._run_streaming(latest_dir)
+
+        stages = instrumentation.stage_timer("evaluation_stage", mode="batch")
+        baseline_data = load_results(latest_dir, self.baseline)
+        if not baseline_data:
+            logging.error(f"{self.baseline} baseline data not found.")
             return
 
-        all_rows = []
-        engines = ["Bing", "Yahoo!"]
+        # Intern the baseline once; every engine is compared against the same ID lists.
+        # The table lives as long as this evaluation, so its URLs are freed with it
+        queries = list(baseline_data.keys())
+        baseline_lists = [baseline_data[q] for q in queries]
+        url_table = URLTable()
+        baseline_ids = [url_table.encode(urls) for urls in baseline_lists]
+        matrix_lists = {self.baseline: baseline_lists}
+
+        frames = []
+        engines = self.engines
+        writer = self._results_writer(engines)
 
         # Store P@k and R@k data for plotting curves
         pr_data = {eng: {'P@k': {k: [] for k in range(1, 11)},
@@ -34,70 +123,346 @@ class Evaluator:
 
         for engine in engines:
             engine_data = load_results(latest_dir, engine)
+            stages.lap("load")
             if not engine_data:
                 logging.warning(f"No data for {engine}, skipping...")
                 continue
 
-            for query, base_urls in google_data.items():
-                target_urls = engine_data.get(query, [])
-
-                # Metrics
-                jaccard = calculate_jaccard(base_urls, target_urls)
-                spearman = robust_spearman(base_urls, target_urls)
-                ndcg = ndcg_at_k(base_urls, target_urls)
-                map_score = average_precision(base_urls, target_urls)
-                p10 = precision_at_k(base_urls, target_urls, k=10)
-
-                # Collect Curve Data
-                for k in range(1, 11):
-                    pr_data[engine]['P@k'][k].append(precision_at_k(base_urls, target_urls, k=k))
-                    pr_data[engine]['R@k'][k].append(recall_at_k(base_urls, target_urls, k=k))
-
-                all_rows.append({
-                    "Engine": engine,
-                    "Query": query,
-                    "Overlap %": jaccard * 100,
-                    "Precision@10": p10,
-                    "MAP": map_score,
-                    "NDCG@10": ndcg,
-                    "Spearman Rho": spearman,
-                    "Jaccard": jaccard
-                })
-
-        if not all_rows:
+            target_lists = [engine_data.get(q, []) for q in queries]
+            metrics = self._compute_metrics(baseline_lists, target_lists, base_ids=baseline_ids, url_table=url_table)
+            if self.engine_matrix:
+                matrix_lists[engine] = target_lists
+
+            # Collect Curve Data
+            for k in range(1, 11):
+                pr_data[engine]['P@k'][k].extend(metrics["P@k"][:, k - 1].tolist())
+                pr_data[engine]['R@k'][k].extend(metrics["R@k"][:, k - 1].tolist())
+
+            frames.append(metrics_frame(engine, queries, metrics))
+            if writer:
+                writer.write(engine, frames[-1], baseline_lists, target_lists)
+            stages.lap("metrics")
+
+        if not frames:
             logging.error("No assessment data generated.")
             return
 
-        df = pd.DataFrame(all_rows)
-        output_file = f"{self.output_dir}/evaluation_final.csv"
-        df.to_csv(output_file, index=False)
-        logging.info(f"Saved CSV: {output_file}")
+        df = pd.concat(frames, ignore_index=True)
+        if writer:
+            writer.close()
+            logging.info(f"Saved {self.output_format}: {writer.path}")
+        else:
+            output_file = f"{self.output_dir}/evaluation_final.csv"
+            df.to_csv(output_file, index=False)
+            logging.info(f"Saved CSV: {output_file}")
+        stages.lap("write")
+
+        # --- ENGINE MATRIX ---
+        if self.engine_matrix:
+            matrix = EngineMatrix.from_lists(matrix_lists, queries, metric_columns, url_table=url_table)
+            matrix.save(f"{self.output_dir}/engine_matrix.npz")
+            self._log_engine_matrix(matrix.engines, matrix.means())
+            stages.lap("matrix")
 
         # --- CROSS VALIDATION ---
-        logging.info("5-FOLD CROSS VALIDATION")
-        for engine in engines:
-            cv_result = run_cross_validation(df, engine, k_folds=5)
-            logging.info(f"[{engine}] {cv_result}")
+        # Every engine and metric is evaluated on the same shared splits of the queries
+        per_query = df.pivot(index="Query", columns="Engine", values=METRIC_COLUMNS)
+        query_scores = {(engine, metric): per_query[(metric, engine)]
+                        for engine in engines if engine in per_query[METRIC_COLUMNS[0]] for metric in METRIC_COLUMNS}
+        cv_scores = {key: scores.to_numpy() for key, scores in query_scores.items()}
+        self._log_stability(repeated_kfold(cv_scores, self.cv_folds, self.cv_repeats, seed=CV_SEED))
+        stages.lap("cv")
 
         # --- BOOTSTRAP ---
         logging.info("BOOTSTRAP CONFIDENCE INTERVALS (95%)")
+        bootstrap_metrics = ["Spearman Rho", "MAP"]
+        scored_engines = [eng for eng in engines if not df[df["Engine"] == eng].empty]
+
+        # One shared resample of queries covers every engine/metric, so engine differences are paired
+        scores = {}
+        for metric in bootstrap_metrics:
+            by_query = df.pivot(index="Query", columns="Engine", values=metric)
+            for engine in scored_engines:
+                scores[(engine, metric)] = by_query[engine].to_numpy()
+        pairs = [((a, metric), (b, metric)) for metric in bootstrap_metrics
+                 for i, a in enumerate(scored_engines) for b in scored_engines[i + 1:]]
+        intervals = paired_bootstrap(scores, pairs, seed=BOOTSTRAP_SEED) if scores else {}
+
         bootstrap_results = {}
-        for engine in engines:
-            subset = df[df["Engine"] == engine]
-            if subset.empty: continue
+        for engine in scored_engines:
+            bs_res = {}
+            for metric in bootstrap_metrics:
+                lo, mean, hi = intervals[(engine, metric)]
+                bs_res[metric.split()[0]] = (lo, mean, hi)
+                logging.info(f"[{engine}] {metric}: {mean:.3f} (CI: {lo:.3f}-{hi:.3f})")
+            bootstrap_results[engine] = bs_res
+
+        for (eng_a, metric), (eng_b, _) in pairs:
+            lo, mean, hi = intervals[((eng_a, metric), (eng_b, metric))]
+            logging.info(f"[{eng_a} - {eng_b}] {metric}: {mean:.3f} (CI: {lo:.3f}-{hi:.3f})")
+        stages.lap("bootstrap")
+
+        # --- T-TEST ---
+        engine_pairs = list(combinations(scored_engines, 2))
+        for eng_a, eng_b in engine_pairs:
+            t, p, sig = run_t_test(query_scores[(eng_a, "Spearman Rho")], query_scores[(eng_b, "Spearman Rho")])
+            logging.info(f"[T-TEST] {eng_a} vs {eng_b}: p={p:.5f} -> {sig}")
+        stages.lap("t_test")
+
+        # --- PERMUTATION TESTS ---
+        if self.permutations and engine_pairs:
+            test_pairs = [((a, metric), (b, metric)) for metric in METRIC_COLUMNS for a, b in engine_pairs]
+            self._log_significance(permutation_tests(query_scores, test_pairs, self.permutations, self.correction,
+                                                     seed=PERMUTATION_SEED))
+        stages.lap("permutation")
+
+        # --- PLOTS ---
+        generate_plots(df, pr_data, bootstrap_results, self.output_dir, plots=self.plots, dpi=self.plot_dpi)
+        stages.lap("plots")
+
+    def _run_streaming(self, latest_dir):
+        """
+        Bounded-memory variant of run(): baseline and target stores are streamed query by query,
+        metrics are computed and written per chunk, and CV, bootstrap, t-test and plot inputs
+        come from running aggregators instead of the full table.
+        """
+        if not has_results(latest_dir, self.baseline):
+            logging.error(f"{self.baseline} baseline data not found.")
+            return
+
+        engines = []
+        for engine in self.engines:
+            if has_results(latest_dir, engine):
+                engines.append(engine)
+            else:
+                logging.warning(f"No data for {engine}, skipping...")
+        if not engines:
+            logging.error("No assessment data generated.")
+            return
+
+        writer = self._results_writer(engines)
+        output_file = f"{self.output_dir}/evaluation_final.csv"
+        part_files = {engine: f"{output_file}.{i}.part" for i, engine in enumerate(engines)} if not writer else {}
+        for path in part_files.values():
+            open(path, "w").close()
+
+        bootstrap_metrics = ["Spearman Rho", "MAP"]
+        boot_keys = [(engine, metric) for engine in engines for metric in bootstrap_metrics]
+        pairs = [((a, metric), (b, metric)) for metric in bootstrap_metrics
+                 for i, a in enumerate(engines) for b in engines[i + 1:]]
+
+        column_stats = {engine: RunningStats(len(METRIC_COLUMNS)) for engine in engines}
+        curve_stats = {engine: RunningStats(20) for engine in engines}
+        sketches = {engine: {col: HistogramSketch(*METRIC_RANGES[col]) for col in METRIC_COLUMNS} for engine in engines}
+        cv_keys = [(engine, metric) for engine in engines for metric in METRIC_COLUMNS]
+        folds = StreamingKFold(cv_keys, k_folds=self.cv_folds, repeats=self.cv_repeats)
+        bootstrap = PoissonBootstrap(len(boot_keys) + len(pairs), seed=BOOTSTRAP_SEED)
+        t_test_pairs = list(combinations(engines, 2))
+        t_test_diff = RunningStats(len(t_test_pairs))
+        test_pairs = [((a, metric), (b, metric)) for metric in METRIC_COLUMNS for a, b in t_test_pairs]
+        sign_flips = SignFlipTest(len(test_pairs), self.permutations, seed=PERMUTATION_SEED) \
+            if self.permutations and test_pairs else None
+        matrix_engines = [self.baseline] + engines
+        matrix_stats = RunningStats(len(matrix_engines) ** 2 * len(METRIC_COLUMNS)) if self.engine_matrix else None
+
+        stages = instrumentation.stage_timer("evaluation_stage", mode="streaming")
+        stream = align_results(iter_latest_results(latest_dir, self.baseline),
+                               {engine: iter_latest_results(latest_dir, engine) for engine in engines})
+        n_queries = 0
+        for chunk, chunk_metrics in self._chunk_metrics(iter_chunks(stream, self.chunk_size), engines):
+            queries = [query for query, _, _ in chunk]
+            keys = [query_key(query) for query in queries]
+            n_queries += len(chunk)
+
+            chunk_frames = {}
+            for engine in engines:
+                metrics = chunk_metrics[engine]
+                frame = metrics_frame(engine, queries, metrics)
+                if writer:
+                    writer.write(engine, frame, [base_urls for _, base_urls, _ in chunk],
+                                 [targets[engine] for _, _, targets in chunk])
+                else:
+                    frame.to_csv(part_files[engine], mode="a", header=False, index=False)
+                chunk_frames[engine] = frame
 
+                column_stats[engine].update(frame[METRIC_COLUMNS].to_numpy())
+                curve_stats[engine].update(np.hstack([metrics["P@k"], metrics["R@k"]]))
+                for col in METRIC_COLUMNS:
+                    sketches[engine][col].update(frame[col].to_numpy())
+
+            folds.update(keys, np.column_stack([chunk_frames[engine][metric].to_numpy() for engine, metric in cv_keys]))
+            boot_cols = [chunk_frames[engine][metric].to_numpy() for engine, metric in boot_keys]
+            boot_cols += [chunk_frames[a][metric].to_numpy() - chunk_frames[b][metric].to_numpy()
+                          for (a, metric), (b, _) in pairs]
+            bootstrap.update(np.column_stack(boot_cols))
+
+            if t_test_pairs:
+                t_test_diff.update(np.column_stack([chunk_frames[a]["Spearman Rho"].to_numpy()
+                                                    - chunk_frames[b]["Spearman Rho"].to_numpy()
+                                                    for a, b in t_test_pairs]))
+            if sign_flips:
+                sign_flips.update(np.column_stack([chunk_frames[a][metric].to_numpy() - chunk_frames[b][metric].to_numpy()
+                                                   for (a, metric), (b, _) in test_pairs]))
+            if matrix_stats:
+                lists = {self.baseline: [base_urls for _, base_urls, _ in chunk]}
+                lists.update({engine: [targets[engine] for _, _, targets in chunk] for engine in engines})
+                matrix_stats.update(EngineMatrix.from_lists(lists, queries, metric_columns).rows())
+            logging.info(f"Evaluated {n_queries} queries...")
+            # Loading and metric computation are interleaved, so each chunk is timed as one stage
+            stages.lap("chunk")
+
+        if writer:
+            writer.close()
+            logging.info(f"Saved {self.output_format}: {writer.path}")
+        else:
+            with open(output_file, "w", newline="") as out:
+                pd.DataFrame(columns=["Engine", "Query"] + METRIC_COLUMNS).to_csv(out, index=False)
+                for engine in engines:
+                    with open(part_files[engine], "r", newline="") as part:
+                        shutil.copyfileobj(part, out)
+                    os.remove(part_files[engine])
+            logging.info(f"Saved CSV: {output_file}")
+        stages.lap("write")
+
+        # --- ENGINE MATRIX ---
+        if matrix_stats:
+            shape = (len(matrix_engines), len(matrix_engines), len(METRIC_COLUMNS))
+            self._log_engine_matrix(matrix_engines, matrix_stats.means().reshape(shape))
+            stages.lap("matrix")
+
+        # --- CROSS VALIDATION ---
+        self._log_stability(folds.result())
+        stages.lap("cv")
+
+        # --- BOOTSTRAP ---
+        logging.info("BOOTSTRAP CONFIDENCE INTERVALS (95%, streaming Poisson bootstrap)")
+        intervals = dict(zip(boot_keys + pairs, bootstrap.intervals()))
+        bootstrap_results = {}
+        for engine in engines:
             bs_res = {}
-            for metric in ["Spearman Rho", "MAP"]:
-                lo, mean, hi = bootstrap_ci(subset[metric].tolist())
+            for metric in bootstrap_metrics:
+                lo, mean, hi = intervals[(engine, metric)]
                 bs_res[metric.split()[0]] = (lo, mean, hi)
                 logging.info(f"[{engine}] {metric}: {mean:.3f} (CI: {lo:.3f}-{hi:.3f})")
             bootstrap_results[engine] = bs_res
+        for pair in pairs:
+            lo, mean, hi = intervals[pair]
+            logging.info(f"[{pair[0][0]} - {pair[1][0]}] {pair[0][1]}: {mean:.3f} (CI: {lo:.3f}-{hi:.3f})")
+        stages.lap("bootstrap")
 
         # --- T-TEST ---
-        bing_scores = df[df["Engine"] == "Bing"]["Spearman Rho"].tolist()
-        yahoo_scores = df[df["Engine"] == "Yahoo!"]["Spearman Rho"].tolist()
-        t, p, sig = run_t_test(bing_scores, yahoo_scores)
-        logging.info(f"[T-TEST] Bing vs Yahoo: p={p:.5f} -> {sig}")
+        for i, (eng_a, eng_b) in enumerate(t_test_pairs):
+            t, p, sig = paired_t_test_from_moments(int(t_test_diff.count[i]), t_test_diff.mean[i],
+                                                   t_test_diff.variance[i])
+            logging.info(f"[T-TEST] {eng_a} vs {eng_b}: p={p:.5f} -> {sig}")
+        stages.lap("t_test")
+
+        # --- PERMUTATION TESTS ---
+        if sign_flips:
+            self._log_significance(significance_table(test_pairs, sign_flips, self.correction))
+        stages.lap("permutation")
 
         # --- PLOTS ---
-        generate_plots(df, pr_data, bootstrap_results, self.output_dir)
+        # Distribution plots are drawn from quantile samples of the sketches, curves and heatmap from running means
+        plot_df = pd.concat([pd.DataFrame({"Engine": engine, **{col: sketches[engine][col].quantile_sample()
+                                                                  for col in METRIC_COLUMNS}})
+                             for engine in engines], ignore_index=True)
+        pr_data = {engine: {'P@k': {k: [curve_stats[engine].means()[k - 1]] for k in range(1, 11)},
+                            'R@k': {k: [curve_stats[engine].means()[k + 9]] for k in range(1, 11)}}
+                   for engine in engines}
+        summary = pd.DataFrame([column_stats[engine].means() for engine in engines],
+                               index=pd.Index(engines, name="Engine"), columns=METRIC_COLUMNS)
+        generate_plots(plot_df, pr_data, bootstrap_results, self.output_dir, summary=summary, plots=self.plots,
+                       dpi=self.plot_dpi)
+        stages.lap("plots")
+
+    def _log_engine_matrix(self, engines, means):
+        """Logs one baseline x engine table per metric and saves the means as engine_matrix.csv."""
+        logging.info("ENGINE MATRIX (rows: baseline, columns: engine)")
+        for j, metric in enumerate(METRIC_COLUMNS):
+            table = pd.DataFrame(means[:, :, j], index=engines, columns=engines)
+            logging.info(f"{metric}:\n{table.to_string(float_format=lambda v: f'{v:.3f}', na_rep='-')}")
+        matrix_summary(engines, METRIC_COLUMNS, means).to_csv(f"{self.output_dir}/engine_matrix.csv")
+
+    def _log_significance(self, table):
+        """Logs paired permutation tests of (engine, metric) pairs and saves them as significance_tests.csv."""
+        logging.info(f"PAIRED PERMUTATION TESTS ({self.permutations} sign flips, {self.correction} correction)")
+        table = pd.DataFrame({"Metric": [a[1] for a in table["A"]], "Engine A": [a[0] for a in table["A"]],
+                              "Engine B": [b[0] for b in table["B"]]}).join(table.drop(columns=["A", "B"]))
+        for _, row in table.iterrows():
+            label = "SIGNIFICANT" if row["Significant"] else "NOT SIGNIFICANT"
+            logging.info(f"[PERMUTATION] {row['Metric']}: {row['Engine A']} - {row['Engine B']} = {row['Mean Diff']:.3f} "
+                         f"(p={row['p']:.5f}, adjusted p={row['p Adjusted']:.5f}) -> {label}")
+        table.to_csv(f"{self.output_dir}/significance_tests.csv", index=False)
+
+    def _log_stability(self, result):
+        """Logs the repeated k-fold summary and saves it as cross_validation.csv."""
+        logging.info(f"{self.cv_repeats}x{self.cv_folds}-FOLD REPEATED CROSS VALIDATION")
+        if result is None:
+            logging.info("Not enough data")
+            return
+        summary = result.summary()
+        for key in result.keys:
+            logging.info(f"[{key[0]}] {result.describe(key, summary)}")
+        summary.rename_axis(["Engine", "Metric"]).to_csv(f"{self.output_dir}/cross_validation.csv")
+
+    def _results_writer(self, engines):
+        """Columnar writer for the per-query rows, or None when they go to evaluation_final.csv."""
+        if self.output_format == "csv":
+            return None
+        from src.utils.columnar import COLUMNAR_FORMATS, ColumnarResultsWriter
+        path = f"{self.output_dir}/evaluation_final.{COLUMNAR_FORMATS[self.output_format]}"
+        return ColumnarResultsWriter(path, engines, METRIC_COLUMNS, self.output_format, self.with_url_ids)
+
+    def _compute_metrics(self, base_lists, target_lists, base_ids=None, url_table=None):
+        """Metrics for one engine; only rows missing from the metric cache are computed (in the pool if there is one)."""
+        def compute(rows=None):
+            bases, targets, ids = base_lists, target_lists, base_ids
+            if rows is not None:
+                bases = [base_lists[i] for i in rows]
+                targets = [target_lists[i] for i in rows]
+                ids = [base_ids[i] for i in rows] if base_ids is not None else None
+            if self.pool:
+                return self.pool.compute(bases, targets)
+            return compute_batch_metrics(ids if ids is not None else bases, targets, k=10, url_table=url_table)
+
+        if self.cache is None:
+            return compute()
+        return self.cache.compute(base_lists, target_lists, compute)
+
+    def _chunk_metrics(self, chunks, engines):
+        """Yields (chunk, {engine: metrics}) in chunk order, computing ahead in the pool if there is one."""
+        if self.pool is None:
+            for chunk in chunks:
+                # A chunk-local URL table keeps interning memory bounded by the chunk size
+                url_table = URLTable()
+                base_lists = [base_urls for _, base_urls, _ in chunk]
+                base_ids = [url_table.encode(base_urls) for base_urls in base_lists]
+                yield chunk, {engine: self._compute_metrics(base_lists, [targets[engine] for _, _, targets in chunk],
+                                                            base_ids=base_ids, url_table=url_table)
+                              for engine in engines}
+            return
+
+        submitted = deque()
+
+        def jobs():
+            for chunk in chunks:
+                lookups = {}
+                submitted.append((chunk, lookups))
+                base_lists = [base_urls for _, base_urls, _ in chunk]
+                for engine in engines:
+                    target_lists = [targets[engine] for _, _, targets in chunk]
+                    if self.cache is None:
+                        yield base_lists, target_lists
+                        continue
+                    # Only cache misses are shipped to the workers
+                    lookup = lookups[engine] = self.cache.lookup(base_lists, target_lists)
+                    yield [base_lists[i] for i in lookup.missing], [target_lists[i] for i in lookup.missing]
+
+        results = self.pool.imap(jobs())
+        for engine_metrics in zip(*[results] * len(engines)):
+            chunk, lookups = submitted.popleft()
+            metrics = dict(zip(engines, engine_metrics))
+            for engine, lookup in lookups.items():
+                metrics[engine] = lookup.complete(metrics[engine])
+            yield chunk, metrics
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import numpy as np
+from src.utils.normalization import normalize_url
+from src.metrics.batch_metrics import METRICS_VERSION
+
+SCALAR_METRICS = ["AP", "NDCG", "Jaccard", "Spearman"]
+# Keys per SELECT ... IN (...), below SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+
+def metric_key(baseline_urls, target_urls, salt: bytes) -> int:
+    """64-bit content hash of a (normalized baseline, normalized target) pair under a metric config."""
+    h = hashlib.blake2b(salt, digest_size=8)
+    h.update("\x1f".join(map(normalize_url, baseline_urls)).encode("utf-8"))
+    h.update(b"\x1e")
+    h.update("\x1f".join(map(normalize_url, target_urls)).encode("utf-8"))
+    return int.from_bytes(h.digest(), "little", signed=True)
+
+
+def pack_metrics(metrics: dict) -> np.ndarray:
+    """compute_batch_metrics output as one (queries x 2k+4) float64 matrix."""
+    return np.column_stack([metrics["P@k"], metrics["R@k"]] + [metrics[name] for name in SCALAR_METRICS])
+
+
+def unpack_metrics(matrix: np.ndarray, k: int) -> dict:
+    metrics = {"P@k": matrix[:, :k], "R@k": matrix[:, k:2 * k]}
+    for i, name in enumerate(SCALAR_METRICS):
+        metrics[name] = matrix[:, 2 * k + i]
+    return {name: np.ascontiguousarray(values) for name, values in metrics.items()}
+
+
+class CacheLookup:
+    """Cached rows of one batch; `missing` rows are computed by the caller and handed to `complete`."""
+
+    def __init__(self, cache, keys, values, hit):
+        self.cache = cache
+        self.keys = keys
+        self.values = values
+        self.hit = hit
+
+    @property
+    def missing(self) -> np.ndarray:
+        return np.flatnonzero(~self.hit)
+
+    def complete(self, fresh: dict) -> dict:
+        """Stores the metrics of the missing rows and returns metrics for the whole batch."""
+        rows = self.missing
+        if len(rows):
+            packed = pack_metrics(fresh)
+            self.values[rows] = packed
+            self.cache.put(self.keys[rows], packed)
+        return unpack_metrics(self.values, self.cache.k)
+
+
+class MetricCache:
+    """
+    Persistent per-query metric cache in SQLite, keyed by a content hash of the normalized
+    (baseline, target) lists, METRICS_VERSION and k. Unchanged SERPs are never recomputed.
+    """
+
+    def __init__(self, path: str, k: int = 10):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.k = k
+        self.width = 2 * k + len(SCALAR_METRICS)
+        self.salt = f"v{METRICS_VERSION}:k{k}".encode("utf-8")
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS metrics (key INTEGER PRIMARY KEY, vals BLOB NOT NULL)")
+
+    def keys(self, baseline_lists, target_lists) -> np.ndarray:
+        return np.fromiter((metric_key(b, t, self.salt) for b, t in zip(baseline_lists, target_lists)),
+                           dtype=np.int64, count=len(baseline_lists))
+
+    def get(self, keys: np.ndarray) -> tuple:
+        """Returns (values, hit): cached metric rows (NaN where missing) and a hit mask."""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        values = np.full((len(unique), self.width), np.nan)
+        hit = np.zeros(len(unique), dtype=bool)
+        position = {key: i for i, key in enumerate(unique.tolist())}
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            batch = unique[start:start + LOOKUP_BATCH].tolist()
+            query = f"SELECT key, vals FROM metrics WHERE key IN ({','.join('?' * len(batch))})"
+            for key, blob in self._conn.execute(query, batch):
+                row = np.frombuffer(blob, dtype=np.float64)
+                if len(row) != self.width: continue
+                values[position[key]] = row
+                hit[position[key]] = True
+        return values[inverse], hit[inverse]
+
+    def put(self, keys: np.ndarray, packed: np.ndarray):
+        self._conn.executemany("INSERT OR REPLACE INTO metrics (key, vals) VALUES (?, ?)",
+                               ((int(key), row.tobytes()) for key, row in zip(keys, packed)))
+        self._conn.commit()
+
+    def lookup(self, baseline_lists, target_lists) -> CacheLookup:
+        """Looks up a batch of raw URL lists; cache statistics count every row."""
+        keys = self.keys(baseline_lists, target_lists)
+        values, hit = self.get(keys)
+        self.hits += int(hit.sum())
+        self.misses += int(len(hit) - hit.sum())
+        return CacheLookup(self, keys, values, hit)
+
+    def compute(self, baseline_lists, target_lists, compute) -> dict:
+        """Metrics for a batch, calling `compute(rows)` only for the row indices not in the cache."""
+        lookup = self.lookup(baseline_lists, target_lists)
+        return lookup.complete(compute(lookup.missing))
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        logging.info(f"Metric cache: {self.hits} hits, {self.misses} computed ({rate:.1f}% reused) [{self.path}]")
+
+    def close(self):
+        if self._conn is None: return
+        self._conn.close()
+        self._conn = None
@@ -0,0 +1,80 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.metrics.batch_metrics import compute_batch_metrics
+from src.utils.url_table import URLTable
+
+# Raw URLs never contain NUL, so it can separate them inside a shard's byte buffer
+URL_SEPARATOR = "\x00"
+
+
+def pack_lists(url_lists) -> tuple:
+    """Packs ranked URL lists into one UTF-8 buffer plus an int32 array of list lengths."""
+    counts = np.fromiter((len(urls) for urls in url_lists), dtype=np.int32, count=len(url_lists))
+    blob = URL_SEPARATOR.join(u or "" for urls in url_lists for u in urls).encode("utf-8")
+    return blob, counts
+
+
+def unpack_lists(blob: bytes, counts) -> list:
+    urls = blob.decode("utf-8").split(URL_SEPARATOR) if counts.sum() else []
+    bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    return [urls[bounds[i]:bounds[i + 1]] for i in range(len(counts))]
+
+
+def encode_shard(baseline_lists, target_lists, k=10) -> dict:
+    """A shard as compact buffers/arrays, cheap to pickle compared to lists of strings."""
+    base_blob, base_counts = pack_lists(baseline_lists)
+    target_blob, target_counts = pack_lists(target_lists)
+    return {"base_blob": base_blob, "base_counts": base_counts,
+            "target_blob": target_blob, "target_counts": target_counts, "k": k}
+
+
+def compute_shard(shard: dict) -> dict:
+    """Worker entry point: metrics for one shard, interned against a shard-local URL table."""
+    baseline_lists = unpack_lists(shard["base_blob"], shard["base_counts"])
+    target_lists = unpack_lists(shard["target_blob"], shard["target_counts"])
+    return compute_batch_metrics(baseline_lists, target_lists, k=shard["k"], url_table=URLTable())
+
+
+def concat_metrics(parts: list) -> dict:
+    """Merges shard results in shard order; metrics are per-row, so the result equals a serial run."""
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+class ShardedMetricPool:
+    """
+    Process pool that computes batch metrics for (baseline, target) shards.
+    Results come back in submission order and at most `workers * 2` shards are in flight.
+    """
+
+    def __init__(self, workers: int, shard_size: int = 5000):
+        self.workers = workers
+        self.shard_size = shard_size
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def imap(self, jobs):
+        """Yields the metrics of each (baseline_lists, target_lists) job, in order."""
+        in_flight = deque()
+        for baseline_lists, target_lists in jobs:
+            in_flight.append(self._executor.submit(compute_shard, encode_shard(baseline_lists, target_lists)))
+            if len(in_flight) >= self.workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def compute(self, baseline_lists, target_lists) -> dict:
+        """compute_batch_metrics over all lists, split into shards of `shard_size` queries."""
+        if not baseline_lists:
+            return compute_batch_metrics([], [])
+        jobs = ((baseline_lists[i:i + self.shard_size], target_lists[i:i + self.shard_size])
+                for i in range(0, len(baseline_lists), self.shard_size))
+        return concat_metrics(list(self.imap(jobs)))
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,31 @@
+from itertools import islice
+
+
+def align_results(baseline, targets: dict):
+    """
+    Joins a baseline (query, urls) stream with one stream per target engine, yielding
+    (query, baseline_urls, {engine: target_urls}). Targets missing a query get [].
+    Target records are buffered only until their baseline query comes up, so memory stays
+    flat when the stores share query order (as the scraper writes them).
+    """
+    iterators = {name: iter(stream) for name, stream in targets.items()}
+    buffers = {name: {} for name in targets}
+
+    for query, base_urls in baseline:
+        row = {}
+        for name, iterator in iterators.items():
+            buffer = buffers[name]
+            if query not in buffer:
+                for target_query, target_urls in iterator:
+                    buffer[target_query] = target_urls
+                    if target_query == query: break
+            row[name] = buffer.pop(query, [])
+        yield query, base_urls, row
+
+
+def iter_chunks(iterable, chunk_size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk: return
+        yield chunk
@@ -1,3 +1,28 @@
-from .ranking_metrics import precision_at_k, recall_at_k, average_precision, ndcg_at_k
-from .similarity_metrics import calculate_jaccard, robust_spearman
-from .statistical_tests import run_t_test
+from src.utils.lazy import lazy_exports
+
+# Public name -> submodule
+_EXPORTS = {
+    "precision_at_k": ".ranking_metrics",
+    "recall_at_k": ".ranking_metrics",
+    "average_precision": ".ranking_metrics",
+    "ndcg_at_k": ".ranking_metrics",
+    "calculate_jaccard": ".similarity_metrics",
+    "robust_spearman": ".similarity_metrics",
+    "robust_kendall": ".similarity_metrics",
+    "run_t_test": ".statistical_tests",
+    "permutation_tests": ".statistical_tests",
+    "adjust_pvalues": ".statistical_tests",
+    "SignFlipTest": ".statistical_tests",
+    "spearman_rho": ".rank_correlation",
+    "kendall_tau": ".rank_correlation",
+    "batch_spearman": ".rank_correlation",
+    "batch_kendall": ".rank_correlation",
+    "pad_rank_vectors": ".rank_correlation",
+    "compute_batch_metrics": ".batch_metrics",
+    "build_hit_matrix": ".batch_metrics",
+    "metrics_from_hit_matrix": ".batch_metrics",
+    "EncodedLists": ".pairwise",
+    "pairwise_metrics": ".pairwise",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,86 @@
+import numpy as np
+from src.utils.url_table import URLTable
+from src.metrics.rank_correlation import batch_spearman
+
+# Bump whenever a metric definition changes, so cached metric values are recomputed
+METRICS_VERSION = 1
+
+
+def build_hit_matrix(base_id_lists, target_id_lists, k=10, block_size=None):
+    """
+    Encodes ranked lists of URL IDs into the fixed-width arrays used by the batch kernel,
+    comparing each block of queries with one padded ID equality tensor (no per-query loop).
+    The rank matrices hold every distinct baseline URL, then the URLs only the target returned.
+    """
+    from src.metrics.pairwise import BLOCK_SIZE, EncodedLists, encode_pair
+
+    base = EncodedLists(base_id_lists, k)
+    target = EncodedLists(target_id_lists, k)
+    block_size = block_size or BLOCK_SIZE
+    blocks = []
+    for start in range(0, max(len(base), 1), block_size):
+        block = slice(start, start + block_size)
+        encoded, _, (ranks_a, ranks_b, rank_mask) = encode_pair(base.rows(block), target.rows(block))
+        blocks.append(dict(encoded, ranks_a=ranks_a, ranks_b=ranks_b, rank_mask=rank_mask))
+    return {name: np.concatenate([encoded[name] for encoded in blocks]) for name in blocks[0]}
+
+
+def ranking_metrics_from_hit_matrix(encoded, k=10):
+    """P@1..k, R@1..k, AP, NDCG@k and Jaccard from an encoded hit matrix (the rank keys are not needed)."""
+    hits = encoded["hits"].astype(float)
+    ranks = np.arange(1, k + 1)
+    cum_hits = np.cumsum(hits, axis=1)
+    base_size = encoded["base_size"]
+
+    precision = cum_hits / ranks
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recall = np.where(base_size[:, None] > 0, cum_hits / base_size[:, None], 0.0)
+
+        possible_hits = np.minimum(base_size, k)
+        ap_sum = (hits * precision).sum(axis=1)
+        ap = np.where(possible_hits > 0, ap_sum / np.maximum(possible_hits, 1), 0.0)
+
+        discounts = 1.0 / np.log2(ranks + 1)
+        # Fixed-width row sums (not BLAS matmul) keep results independent of batch size
+        dcg = (encoded["gains"] * discounts).sum(axis=1)
+        idcg = (encoded["ideal"] * discounts).sum(axis=1)
+        ndcg = np.where(idcg > 0, dcg / np.where(idcg > 0, idcg, 1.0), 0.0)
+
+        union = encoded["union"]
+        jaccard = np.where(union > 0, encoded["intersection"] / np.maximum(union, 1), 0.0)
+
+    return {
+        "P@k": precision,
+        "R@k": recall,
+        "AP": ap,
+        "NDCG": ndcg,
+        "Jaccard": jaccard,
+    }
+
+
+def spearman_from_rank_matrix(ranks_a, ranks_b, rank_mask):
+    """Per-query Spearman rho of padded rank vectors; 0 where at most one item is ranked."""
+    spearman = batch_spearman(ranks_a, ranks_b, rank_mask)
+    return np.where(rank_mask.sum(axis=1) <= 1, 0.0, spearman)
+
+
+def metrics_from_hit_matrix(encoded, k=10):
+    """Computes every per-query metric from an encoded hit matrix in one pass."""
+    metrics = ranking_metrics_from_hit_matrix(encoded, k)
+    metrics["Spearman"] = spearman_from_rank_matrix(encoded["ranks_a"], encoded["ranks_b"], encoded["rank_mask"])
+    return metrics
+
+
+def compute_batch_metrics(baseline_lists, target_lists, k=10, url_table=None):
+    """
+    Computes P@1..k, R@1..k, AP, NDCG@k, Jaccard and Spearman rho for a batch of
+    (baseline, target) ranked URL lists. Lists are interned to URL IDs exactly once;
+    already-encoded array('i') / NumPy ID lists are used as is, so pass the `url_table` that
+    encoded them. Without one, the batch is interned into a fresh table.
+    Returns a dict of NumPy arrays: 'P@k' and 'R@k' are (queries x k), the rest (queries,).
+    """
+    url_table = url_table if url_table is not None else URLTable()
+    base_ids = [url_table.encode(urls) for urls in baseline_lists]
+    target_ids = [url_table.encode(urls) for urls in target_lists]
+    encoded = build_hit_matrix(base_ids, target_ids, k)
+    return metrics_from_hit_matrix(encoded, k)
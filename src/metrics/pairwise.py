@@ -0,0 +1,136 @@
+from itertools import chain, combinations
+import numpy as np
+from src.metrics.batch_metrics import ranking_metrics_from_hit_matrix, spearman_from_rank_matrix
+from src.metrics.rank_correlation import MISSING_RANK
+
+PAD_ID = -1
+# Queries compared per block; bounds the (queries x width x width) equality tensors
+BLOCK_SIZE = 4096
+
+
+class EncodedLists:
+    """
+    One engine's ranked URL ID lists for a batch of queries, prepared once for comparison
+    against any number of other engines: a padded ID matrix with first/last-occurrence masks
+    (URL sets and rank maps) and the top-k relevance of each position (NDCG gains).
+    Repeated URLs follow build_hit_matrix: sets count them once, rank maps keep their last position.
+    """
+
+    def __init__(self, id_lists, k=10, block_size=BLOCK_SIZE):
+        n = len(id_lists)
+        lengths = np.fromiter((len(ids) for ids in id_lists), dtype=np.int64, count=n)
+        width = max(int(lengths.max(initial=0)), 1)
+        ids = np.full((n, width), PAD_ID, dtype=np.int64)
+        if lengths.sum():
+            # Scatter the concatenated lists into their rows: row q, column position - start of q
+            starts = np.cumsum(lengths) - lengths
+            rows = np.repeat(np.arange(n), lengths)
+            ids[rows, np.arange(len(rows)) - starts[rows]] = np.fromiter(chain.from_iterable(id_lists), np.int64, len(rows))
+
+        self.k = k
+        self.ids = ids
+        self.valid = ids != PAD_ID
+        self.rank = np.arange(width) + 1
+        self.first = np.empty_like(self.valid)
+        self.last = np.empty_like(self.valid)
+        self.relevance = np.empty((n, width), dtype=np.int64)
+        for start in range(0, n, block_size):
+            self._mark_occurrences(slice(start, start + block_size))
+
+        ideal = -np.sort(-self.relevance, axis=1)[:, :k]
+        self.ideal = np.zeros((n, k))
+        self.ideal[:, :ideal.shape[1]] = ideal
+
+        self.distinct = self.first.sum(axis=1).astype(float)
+        self.top_size = np.minimum(lengths, k).astype(float)
+
+    def _mark_occurrences(self, block):
+        """First/last-occurrence masks and relevance for a slice of queries (one equality tensor per block)."""
+        ids, valid, k = self.ids[block], self.valid[block], self.k
+        positions = self.rank - 1
+        same = (ids[:, :, None] == ids[:, None, :]) & valid[:, None, :]
+        later = positions[None, :] > positions[:, None]
+        self.first[block] = valid & ~(same & later.T).any(axis=2)
+        self.last[block] = valid & ~(same & later).any(axis=2)
+
+        # Relevance k - position of the last occurrence within the top k (0 elsewhere)
+        top = positions < k
+        last_in_top = valid & top & ~(same & later & top[None, :]).any(axis=2)
+        self.relevance[block] = np.where(last_in_top, k - positions, 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, block):
+        """View of the prepared arrays for a slice of queries."""
+        view = object.__new__(EncodedLists)
+        view.k, view.rank = self.k, self.rank
+        for name in ("ids", "valid", "first", "last", "relevance", "ideal", "distinct", "top_size"):
+            setattr(view, name, getattr(self, name)[block])
+        return view
+
+
+def _top_k(matrix, k):
+    """First k columns of `matrix`, zero-padded when it is narrower."""
+    out = np.zeros((matrix.shape[0], k), dtype=matrix.dtype)
+    width = min(k, matrix.shape[1])
+    out[:, :width] = matrix[:, :width]
+    return out
+
+
+def encode_pair(a, b):
+    """
+    build_hit_matrix inputs for both directions of one engine pair (a as baseline, then b),
+    from one URL equality tensor. The rank vectors are shared: Spearman rho is symmetric.
+    """
+    k = a.k
+    eq = (b.ids[:, :, None] == a.ids[:, None, :]) & b.valid[:, :, None] & a.valid[:, None, :]
+    b_in_a = eq.any(axis=2)
+    a_in_b = eq.any(axis=1)
+
+    intersection = (b_in_a & b.first).sum(axis=1).astype(float)
+    union = a.distinct + b.distinct - intersection
+
+    # Union of both lists: every distinct URL of a, then the URLs only b returned
+    rank_in_b = np.where(a_in_b, (eq * b.rank[None, :, None]).max(axis=1), MISSING_RANK)
+    ranks_a = np.hstack([np.broadcast_to(a.rank, a.ids.shape), np.full(b.ids.shape, MISSING_RANK)])
+    ranks_b = np.hstack([rank_in_b, np.broadcast_to(b.rank, b.ids.shape)])
+    rank_mask = np.hstack([a.last, b.last & ~b_in_a])
+
+    a_to_b = {
+        "hits": _top_k(b_in_a, k),
+        "gains": _top_k((eq * a.relevance[:, None, :]).sum(axis=2), k).astype(float),
+        "ideal": a.ideal, "base_size": a.distinct, "target_size": b.top_size,
+        "intersection": intersection, "union": union,
+    }
+    b_to_a = {
+        "hits": _top_k(a_in_b, k),
+        "gains": _top_k((eq * b.relevance[:, :, None]).sum(axis=1), k).astype(float),
+        "ideal": b.ideal, "base_size": b.distinct, "target_size": a.top_size,
+        "intersection": intersection, "union": union,
+    }
+    return a_to_b, b_to_a, (ranks_a, ranks_b, rank_mask)
+
+
+def pairwise_metrics(encoded, block_size=BLOCK_SIZE):
+    """
+    Metrics of every ordered engine pair from {engine: EncodedLists} aligned by query.
+    Each unordered pair shares one equality tensor and one Spearman computation, so the
+    work is E(E-1)/2 pair encodings on top of E list preparations.
+    Returns {(baseline, target): metrics} in the format of compute_batch_metrics.
+    """
+    engines = list(encoded)
+    k = encoded[engines[0]].k if engines else 10
+    n = len(encoded[engines[0]]) if engines else 0
+    results = {}
+    for a, b in combinations(engines, 2):
+        blocks_ab, blocks_ba = [], []
+        for start in range(0, max(n, 1), block_size):
+            block = slice(start, start + block_size)
+            a_to_b, b_to_a, ranks = encode_pair(encoded[a].rows(block), encoded[b].rows(block))
+            spearman = spearman_from_rank_matrix(*ranks)
+            blocks_ab.append(dict(ranking_metrics_from_hit_matrix(a_to_b, k), Spearman=spearman))
+            blocks_ba.append(dict(ranking_metrics_from_hit_matrix(b_to_a, k), Spearman=spearman))
+        results[(a, b)] = {name: np.concatenate([m[name] for m in blocks_ab]) for name in blocks_ab[0]}
+        results[(b, a)] = {name: np.concatenate([m[name] for m in blocks_ba]) for name in blocks_ba[0]}
+    return results
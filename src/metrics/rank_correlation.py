@@ -0,0 +1,122 @@
+import math
+import numpy as np
+
+MISSING_RANK = 11
+
+
+def top_k_rank_vectors(list_a, list_b, missing_rank=MISSING_RANK):
+    """
+    Integer rank vectors of two ranked lists over the union of their items.
+    Items absent from a list get `missing_rank`; repeated items keep their last position.
+    """
+    rank_map_a = {item: i + 1 for i, item in enumerate(list_a)}
+    rank_map_b = {item: i + 1 for i, item in enumerate(list_b)}
+    universe = rank_map_a.keys() | rank_map_b.keys()
+    ranks_a = np.fromiter((rank_map_a.get(u, missing_rank) for u in universe), dtype=np.int64, count=len(universe))
+    ranks_b = np.fromiter((rank_map_b.get(u, missing_rank) for u in universe), dtype=np.int64, count=len(universe))
+    return ranks_a, ranks_b
+
+
+def pad_rank_vectors(pairs, missing_rank=MISSING_RANK):
+    """
+    Stacks (list_a, list_b) pairs into padded (queries x universe) rank matrices plus a validity mask,
+    the input format of batch_spearman / batch_kendall.
+    """
+    vectors = [top_k_rank_vectors(a, b, missing_rank) for a, b in pairs]
+    width = max([len(ra) for ra, _ in vectors] + [1])
+    ranks_a = np.full((len(vectors), width), missing_rank, dtype=np.int64)
+    ranks_b = np.full((len(vectors), width), missing_rank, dtype=np.int64)
+    mask = np.zeros((len(vectors), width), dtype=bool)
+    for q, (ra, rb) in enumerate(vectors):
+        ranks_a[q, :len(ra)] = ra
+        ranks_b[q, :len(rb)] = rb
+        mask[q, :len(ra)] = True
+    return ranks_a, ranks_b, mask
+
+
+def _doubled_average_ranks(values, mask):
+    """
+    Row-wise average ranks (ties share the mean rank) over the masked entries, times two so
+    they stay integers; padded entries are 0.
+    """
+    valid = mask[:, None, :]
+    less = ((values[:, None, :] < values[:, :, None]) & valid).sum(axis=2)
+    equal = ((values[:, None, :] == values[:, :, None]) & valid).sum(axis=2)
+    return np.where(mask, 2 * less + equal + 1, 0)
+
+
+def _integer_pearson(x, y, n):
+    """
+    Pearson correlation from exact integer sums, so the result does not depend on padding
+    width or on how rows are chunked.
+    """
+    sx, sy = x.sum(axis=-1), y.sum(axis=-1)
+    cov = n * (x * y).sum(axis=-1) - sx * sy
+    var_x = n * (x * x).sum(axis=-1) - sx * sx
+    var_y = n * (y * y).sum(axis=-1) - sy * sy
+    den = np.sqrt(var_x.astype(float) * var_y.astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, cov / np.where(den > 0, den, 1.0), np.nan)
+
+
+def _masked_spearman(x, y, mask):
+    return _integer_pearson(_doubled_average_ranks(x, mask), _doubled_average_ranks(y, mask), mask.sum(axis=1))
+
+
+def _masked_kendall_tau_b(x, y, mask):
+    pair_mask = mask[:, :, None] & mask[:, None, :]
+    pair_mask &= np.triu(np.ones(pair_mask.shape[1:], dtype=bool), k=1)
+    sign_x = np.sign(x[:, :, None] - x[:, None, :]) * pair_mask
+    sign_y = np.sign(y[:, :, None] - y[:, None, :]) * pair_mask
+    num = (sign_x * sign_y).sum(axis=(1, 2))
+    den = np.sqrt(np.count_nonzero(sign_x, axis=(1, 2)) * np.count_nonzero(sign_y, axis=(1, 2)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+
+
+def _chunked(func, ranks_a, ranks_b, mask, chunk_size):
+    ranks_a = np.asarray(ranks_a)
+    ranks_b = np.asarray(ranks_b)
+    mask = np.asarray(mask, dtype=bool)
+    out = np.empty(len(mask))
+    for start in range(0, len(mask), chunk_size):
+        rows = slice(start, start + chunk_size)
+        out[rows] = func(ranks_a[rows], ranks_b[rows], mask[rows])
+    return out
+
+
+def batch_spearman(ranks_a, ranks_b, mask, chunk_size=2048):
+    """
+    Spearman rho for every row of two padded (queries x universe) rank matrices.
+    Rows with a constant rank vector yield NaN, like pandas' Series.corr.
+    """
+    return _chunked(_masked_spearman, ranks_a, ranks_b, mask, chunk_size)
+
+
+def batch_kendall(ranks_a, ranks_b, mask, chunk_size=2048):
+    """Kendall tau-b for every row of two padded (queries x universe) rank matrices."""
+    return _chunked(_masked_kendall_tau_b, ranks_a, ranks_b, mask, chunk_size)
+
+
+def _doubled_average_ranks_1d(values):
+    less = (values[None, :] < values[:, None]).sum(axis=1)
+    equal = (values[None, :] == values[:, None]).sum(axis=1)
+    return 2 * less + equal + 1
+
+
+def spearman_rho(ranks_a, ranks_b):
+    """Spearman rho of two equal-length rank vectors."""
+    x = _doubled_average_ranks_1d(np.asarray(ranks_a))
+    y = _doubled_average_ranks_1d(np.asarray(ranks_b))
+    return float(_integer_pearson(x, y, len(x)))
+
+
+def kendall_tau(ranks_a, ranks_b):
+    """Kendall tau-b of two equal-length rank vectors."""
+    ranks_a = np.asarray(ranks_a)
+    ranks_b = np.asarray(ranks_b)
+    upper = np.triu(np.ones((len(ranks_a), len(ranks_a)), dtype=bool), k=1)
+    sign_x = np.sign(ranks_a[:, None] - ranks_a[None, :])[upper]
+    sign_y = np.sign(ranks_b[:, None] - ranks_b[None, :])[upper]
+    den = math.sqrt(np.count_nonzero(sign_x) * np.count_nonzero(sign_y))
+    return float(sign_x @ sign_y) / den if den > 0 else float("nan")
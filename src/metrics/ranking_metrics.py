@@ -1,17 +1,17 @@
 import math
-from src.utils.normalization import normalize_url
+from src.utils.url_table import encode_together
 
 def precision_at_k(baseline_urls, target_urls, k=10):
-    norm_base = set(normalize_url(u) for u in baseline_urls)
-    norm_target = [normalize_url(u) for u in target_urls][:k]
-    if not norm_target: return 0.0
+    norm_base, norm_target = encode_together(baseline_urls, target_urls)
+    norm_base, norm_target = set(norm_base), norm_target[:k]
+    if len(norm_target) == 0: return 0.0
     hits = sum(1 for url in norm_target if url in norm_base)
     return hits / k
 
 def recall_at_k(baseline_urls, target_urls, k=10):
     """Calculates Recall@k: (Relevant Retrieved) / (Total Relevant)"""
-    norm_base = set(normalize_url(u) for u in baseline_urls)
-    norm_target = [normalize_url(u) for u in target_urls][:k]
+    norm_base, norm_target = encode_together(baseline_urls, target_urls)
+    norm_base, norm_target = set(norm_base), norm_target[:k]
 
     total_relevant = len(norm_base)
     if total_relevant == 0: return 0.0
@@ -20,8 +20,8 @@ def recall_at_k(baseline_urls, target_urls, k=10):
     return hits / total_relevant
 
 def average_precision(baseline_urls, target_urls, k=10):
-    norm_base = set(normalize_url(u) for u in baseline_urls)
-    norm_target = [normalize_url(u) for u in target_urls][:k]
+    norm_base, norm_target = encode_together(baseline_urls, target_urls)
+    norm_base, norm_target = set(norm_base), norm_target[:k]
     hits = 0
     sum_precisions = 0.0
     for i, url in enumerate(norm_target):
@@ -33,14 +33,13 @@ def average_precision(baseline_urls, target_urls, k=10):
 
 def ndcg_at_k(baseline_urls, target_urls, k=10):
     relevance_map = {}
-    norm_base = [normalize_url(u) for u in baseline_urls]
+    norm_base, norm_target = encode_together(baseline_urls, target_urls)
     for rank, url in enumerate(norm_base):
         if rank >= k: break
         relevance_map[url] = k - rank
 
     dcg = 0.0
-    norm_target = [normalize_url(u) for u in target_urls][:k]
-    for i, url in enumerate(norm_target):
+    for i, url in enumerate(norm_target[:k]):
         rel = relevance_map.get(url, 0)
         dcg += rel / math.log2(i + 2)
 
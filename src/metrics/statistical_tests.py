@@ -1,13 +1,157 @@
-from scipy import stats
+import numpy as np
+import pandas as pd
+
+# Upper bound on sign-flip entries (permutations x queries) held in memory at once
+MAX_CHUNK_ELEMENTS = 1 << 20
+CORRECTIONS = ("holm", "bh", "none")
+
+
+def align_pairs(scores_a, scores_b):
+    """
+    Pairs two score series by query: pandas Series / dicts keyed by query are joined on their
+    keys, plain sequences are taken as already aligned. Queries missing or NaN on either side are dropped.
+    """
+    a, b = (pd.Series(s) if isinstance(s, dict) else s for s in (scores_a, scores_b))
+    if isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        paired = pd.concat([a, b], axis=1, join="inner").dropna()
+        return paired.iloc[:, 0].to_numpy(dtype=float), paired.iloc[:, 1].to_numpy(dtype=float)
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if len(a) != len(b):
+        raise ValueError(f"Unkeyed score lists must be aligned: got {len(a)} and {len(b)} scores")
+    valid = ~(np.isnan(a) | np.isnan(b))
+    return a[valid], b[valid]
+
 
 def run_t_test(list_a, list_b):
     """
-    Runs a Paired T-Test between two lists of scores.
+    Runs a Paired T-Test between two series of scores, paired by query (see align_pairs).
     Returns (t_statistic, p_value, significance_label)
     """
-    if len(list_a) > 5 and len(list_b) > 5:
-        min_len = min(len(list_a), len(list_b))
-        t, p = stats.ttest_rel(list_a[:min_len], list_b[:min_len])
+    list_a, list_b = align_pairs(list_a, list_b)
+    if len(list_a) > 5:
+        # scipy.stats is imported on first use; it dominates the package import time
+        from scipy import stats
+        t, p = stats.ttest_rel(list_a, list_b)
         sig = "SIGNIFICANT" if p < 0.05 else "NOT SIGNIFICANT"
         return t, p, sig
     return 0.0, 1.0, "INSUFFICIENT DATA"
+
+def paired_t_test_from_moments(n, mean_diff, var_diff):
+    """
+    Paired T-Test from the count, mean and sample variance of the per-query differences,
+    so it can run on streamed running statistics.
+    Returns (t_statistic, p_value, significance_label)
+    """
+    if n > 5:
+        from scipy import stats
+        se = (var_diff / n) ** 0.5
+        t = mean_diff / se if se > 0 else float("nan")
+        p = 2 * stats.t.sf(abs(t), n - 1) if se > 0 else float("nan")
+        sig = "SIGNIFICANT" if p < 0.05 else "NOT SIGNIFICANT"
+        return t, p, sig
+    return 0.0, 1.0, "INSUFFICIENT DATA"
+
+
+def adjust_pvalues(pvalues, method="holm"):
+    """Family-wise (Holm step-down) or false-discovery-rate (Benjamini-Hochberg) adjusted p-values."""
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction: {method}")
+    p = np.asarray(pvalues, dtype=float)
+    m = len(p)
+    if method == "none" or m == 0:
+        return p.copy()
+    adjusted = np.empty(m)
+    if method == "holm":
+        order = np.argsort(p)
+        adjusted[order] = np.minimum(np.maximum.accumulate((m - np.arange(m)) * p[order]), 1.0)
+    else:
+        order = np.argsort(p)[::-1]
+        adjusted[order] = np.minimum(np.minimum.accumulate(p[order] * m / np.arange(m, 0, -1)), 1.0)
+    return adjusted
+
+
+class SignFlipTest:
+    """
+    Paired randomization tests of several mean differences at once. Under the null each
+    query's difference is equally likely to have either sign, so every permutation is a
+    random sign-flip vector and the permuted sums of all tests come from one matrix
+    product per block. Signs are independent per query, so rows can be streamed in chunks.
+    """
+
+    def __init__(self, n_tests: int, n_permutations: int = 10000, seed=None, max_elements=MAX_CHUNK_ELEMENTS):
+        self.n_permutations = n_permutations
+        self.max_elements = max_elements
+        self.rng = np.random.default_rng(seed)
+        self.observed = np.zeros(n_tests)
+        self.count = np.zeros(n_tests)
+        # Permuted sums minus the observed sum: each flipped query subtracts twice its difference
+        self.flipped = np.zeros((n_permutations, n_tests))
+
+    def update(self, diffs):
+        """`diffs` is (queries x tests) of paired differences; NaN marks a query missing from a test."""
+        diffs = np.asarray(diffs, dtype=float).reshape(len(diffs), -1)
+        valid = ~np.isnan(diffs)
+        filled = np.where(valid, diffs, 0.0)
+        n = len(filled)
+        self.observed += filled.sum(axis=0)
+        self.count += valid.sum(axis=0)
+        if n == 0:
+            return
+
+        block = max(1, min(self.n_permutations, self.max_elements // n))
+        # Reused float buffer for the sign bits: converting them dominates the cost, not the product
+        signs = np.empty((block, n))
+        for start in range(0, self.n_permutations, block):
+            size = min(block, self.n_permutations - start)
+            # One random bit per (permutation, query), drawn a byte at a time
+            bits = np.unpackbits(self.rng.integers(0, 256, size=(size, (n + 7) // 8), dtype=np.uint8),
+                                 axis=1, count=n)
+            np.copyto(signs[:size], bits)
+            self.flipped[start:start + size] -= 2.0 * (signs[:size] @ filled)
+
+    def results(self):
+        """(count, mean difference, two-sided p-value) per test; p counts the observed arrangement."""
+        permuted = np.abs(self.observed + self.flipped)
+        # Tolerance so permutations that only reorder floating-point sums count as ties
+        threshold = np.abs(self.observed) * (1 - 1e-9) - 1e-12
+        extreme = (permuted >= threshold).sum(axis=0)
+        pvalues = (extreme + 1) / (self.n_permutations + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(self.count > 0, self.observed / np.maximum(self.count, 1), np.nan)
+        return self.count.astype(int), means, np.where(self.count > 0, pvalues, np.nan)
+
+
+def significance_table(keys, test, correction="holm", alpha=0.05):
+    """Per-test count, mean difference, raw and adjusted p-values from a finished SignFlipTest."""
+    count, means, pvalues = test.results()
+    tested = ~np.isnan(pvalues)
+    adjusted = np.full(len(pvalues), np.nan)
+    adjusted[tested] = adjust_pvalues(pvalues[tested], correction)
+    return pd.DataFrame({
+        "A": [a for a, _ in keys], "B": [b for _, b in keys],
+        "N": count, "Mean Diff": means, "p": pvalues, "p Adjusted": adjusted,
+        "Significant": adjusted < alpha,
+    })
+
+
+def permutation_tests(scores, pairs, n_permutations=10000, correction="holm", alpha=0.05, seed=None,
+                      max_elements=MAX_CHUNK_ELEMENTS):
+    """
+    Paired permutation tests of mean(scores[a] - scores[b]) for every (a, b) in `pairs`, in one
+    batch. `scores` maps a key (e.g. (engine, metric)) to per-query scores, keyed by query as in
+    align_pairs. p-values are adjusted over the whole family with `correction` ("holm", "bh" or "none").
+    """
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction: {correction}")
+    if not pairs:
+        return significance_table([], SignFlipTest(0, n_permutations), correction, alpha)
+    series = {key: pd.Series(s) if isinstance(s, dict) else s for key, s in scores.items()}
+    if all(isinstance(s, pd.Series) for s in series.values()):
+        # Differences are aligned on query; queries a pair does not share become NaN
+        diffs = pd.concat([series[a] - series[b] for a, b in pairs], axis=1).to_numpy(dtype=float)
+    else:
+        diffs = np.column_stack([np.asarray(series[a], dtype=float) - np.asarray(series[b], dtype=float)
+                                 for a, b in pairs])
+    test = SignFlipTest(len(pairs), n_permutations, seed, max_elements)
+    test.update(diffs)
+    return significance_table(pairs, test, correction, alpha)
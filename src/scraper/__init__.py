@@ -1,5 +1,19 @@
-from .driver import setup_driver
-from .base_engine import BaseEngine
-from .google_engine import GoogleEngine
-from .bing_engine import BingEngine
-from .yahoo_engine import YahooEngine
+from src.utils.lazy import lazy_exports
+
+# Public name -> submodule
+_EXPORTS = {
+    "setup_driver": ".driver",
+    "DriverPool": ".driver",
+    "BaseEngine": ".base_engine",
+    "LinkFilter": ".link_filter",
+    "GoogleEngine": ".google_engine",
+    "BingEngine": ".bing_engine",
+    "YahooEngine": ".yahoo_engine",
+    "ScrapeScheduler": ".scheduler",
+    "RetryPolicy": ".retry",
+    "AdaptivePacer": ".pacing",
+    "SearchBlocked": ".retry",
+    "HTTPSearchBackend": ".http_engine",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,97 +1,172 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 import logging
 import time
-import random
+import threading
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from src.utils.normalization import decode_bing_redirect
+from src.utils import instrumentation
+from .dom_links import collect_link_candidates, result_links_first
+from .link_filter import LinkFilter
+from .retry import SearchBlocked
+from .pacing import AdaptivePacer
 
-class BaseEngine(ABC):
-    def __init__(self, config, limit, min_delay, max_delay):
-        self.config = config
-        self.limit = limit
-        self.min_delay = min_delay
-        self.max_delay = max_delay
+CAPTCHA_MARKERS = ["verify you are human", "solve this puzzle", "challenge"]
 
-    @abstractmethod
-    def get_links(self, driver, container):
-         """Extract links from the container."""
-         pass
+_prompt_lock = threading.Lock()
 
-    def is_valid(self, link, seen_set):
-        if not link: return False
-        if not link.startswith("http"): return False
-        if link in seen_set: return False
-
-        forbidden_terms = [
-            "aclick", "login", "signup", "preferences", "settings",
-            "privacy", "terms", "cookie", "advertisement", "form=",
-            "adurl"
-        ]
 
-        if "/search?" in link or "search." in link:
-            return False
+def prompt_captcha_solve(engine, driver, query):
+    """Interactive CAPTCHA hook: waits for the user to solve it in the browser. One prompt at a time."""
+    with _prompt_lock:
+        logging.warning(f"!!! [{engine.name}] BLOCKED on '{query}'. Pausing this worker for manual intervention...")
+        print('\a')
+        input(f">>> SOLVE CAPTCHA IN BROWSER -> PRESS [ENTER] HERE TO CONTINUE...")
+    return True
 
-        if "bing.com/search" in link or "google.com/search" in link:
-             return False
 
-        if any(term in link for term in forbidden_terms):
-            return False
+class BaseEngine(ABC):
+    # Engine label in logs and instrumentation
+    name = "engine"
 
-        return True
+    def __init__(self, config, limit, min_delay, max_delay, link_filter=None, snapshots=None, captcha_solver=None,
+                 pacer=None):
+        self.config = config
+        self.limit = limit
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        # The engine's own `link_filter` config section overrides the default rules
+        self.link_filter = link_filter or LinkFilter.from_config(override=config.get("link_filter"))
+        # Optional SnapshotStore archiving the raw HTML of every scraped page
+        self.snapshots = snapshots
+        # Optional (engine, driver, query) -> solved? hook; without one a CAPTCHA raises SearchBlocked
+        self.captcha_solver = captcha_solver
+        # Adaptive request rate; starts at the mean rate of the min_delay..max_delay range by default
+        self.pacer = pacer or AdaptivePacer.from_config(None, min_delay, max_delay)
+
+    def __getstate__(self):
+        # The snapshot store's index connection stays in the process that opened it
+        return {**self.__dict__, "snapshots": None}
+
+    def save_snapshot(self, query, html, url):
+        """Archives a page when snapshots are on; a failed write never costs the query its results."""
+        if self.snapshots is None: return
+        try:
+            self.snapshots.save(self.name, query, html, url)
+            instrumentation.count("snapshots_saved", engine=self.name)
+        except Exception as e:
+            logging.warning(f"[{self.name}] Could not archive the page for '{query}': {str(e)[:100]}")
+
+    def get_links(self, driver, container, seen):
+        """
+        Extract links from the container, reading every anchor in one script round-trip.
+        Anchors matching the engine's `link_selector` are taken first.
+        """
+        candidates = collect_link_candidates(driver, container, self.config.get("link_selector"))
+        logging.info(f"Scanning {len(candidates)} raw links in main container...")
+        return self.filter_links(result_links_first(candidates), seen)
+
+    def filter_links(self, candidates, seen, results=None):
+        """Decodes and validates LinkCandidates in order, appending up to `limit` links to `results`."""
+        results = [] if results is None else results
+        for candidate in candidates:
+            if len(results) >= self.limit: break
+            try:
+                link = self.process_link(candidate.href)
+            except Exception:
+                continue
+
+            reason = self.link_filter.rejection(link, seen)
+            if reason is None:
+                results.append(link)
+                seen.add(link)
+            else:
+                instrumentation.count("links_rejected", engine=self.name, reason=reason)
+                logging.debug(f"Rejected ({reason}): {link}")
+        return results
 
-    def search(self, query, driver):
-        time.sleep(random.randint(self.min_delay, self.max_delay))
-        target_url = self.config["url"] + query.replace(" ", "+")
+    def is_valid(self, link, seen_set):
+        return self.link_filter.rejection(link, seen_set) is None
+
+    def build_url(self, query):
+        return self.config["url"] + query.replace(" ", "+")
+
+    def next_delay(self):
+        """Seconds to wait before the next query, as paced by the engine's adaptive rate."""
+        return self.pacer.next_delay()
+
+    def report(self, outcome):
+        """Feeds a response outcome (see pacing.OUTCOMES) back to the pacer."""
+        rate = self.pacer.record(outcome)
+        if outcome != "ok":
+            instrumentation.count("pacing_backoffs", engine=self.name, reason=outcome)
+            logging.info(f"[{self.name}] {outcome} response, slowing down to {rate:.3f} requests/s.")
+
+    def throttle(self):
+        """Politeness delay before a query. Schedulers call it before taking a driver from the pool."""
+        time.sleep(self.next_delay())
+
+    def search(self, query, driver, throttle=True):
+        if throttle:
+            self.throttle()
+        target_url = self.build_url(query)
         logging.info(f"Navigating to: {target_url}")
 
         results = []
         seen = set()
+        phases = instrumentation.stage_timer("scrape_phase", engine=self.name)
 
         try:
+            load_start = time.perf_counter()
             driver.get(target_url)
+            logging.info(f"Page loaded in {time.perf_counter() - load_start:.2f}s")
+            phases.lap("navigation")
             wait = WebDriverWait(driver, 10)
             wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            phases.lap("body_wait")
 
             # Captcha check
             page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
-            if any(x in page_text for x in ["verify you are human", "solve this puzzle", "challenge"]):
-                logging.warning(f"!!! BLOCKED. Pausing for manual intervention...")
-                print('\a')
-                input(f">>> SOLVE CAPTCHA IN BROWSER -> PRESS [ENTER] HERE TO CONTINUE...")
+            if any(x in page_text for x in CAPTCHA_MARKERS):
+                instrumentation.count("captcha_detections", engine=self.name)
+                self.report("blocked")
+                if not (self.captcha_solver and self.captcha_solver(self, driver, query)):
+                    raise SearchBlocked(f"{self.name} served a CAPTCHA for '{query}'")
                 logging.info("Resuming... Refreshing page...")
                 driver.get(target_url)
                 time.sleep(5)
+                phases.lap("captcha")
 
             # Scraping Strategy 1: Specific Selector
             try:
                 wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, self.config["container"])))
                 container = driver.find_element(By.CSS_SELECTOR, self.config["container"])
+                phases.lap("container_wait")
                 results = self.get_links(driver, container, seen)
+                phases.lap("container_scan")
 
             except Exception as e:
+                phases.lap("container_wait")
                 logging.warning(f"Main container not found ({e}). Trying fallback...")
 
             # Scraping Strategy 2: Fallback
             if len(results) < self.limit:
                  logging.info("Engaging global fallback...")
-                 all_links = driver.find_elements(By.TAG_NAME, "a")
-                 for a in all_links:
-                    try:
-                        link = a.get_attribute("href")
-                        # Perform specific engine decoding if needed (e.g. Bing)
-                        # Ideally this should be handled by a method that can be overridden
-                        link = self.process_link(link) 
-                        
-                        if self.is_valid(link, seen):
-                            results.append(link)
-                            seen.add(link)
-                    except:
-                        continue
-                    if len(results) >= self.limit: break
+                 instrumentation.count("fallback_engagements", engine=self.name)
+                 results = self.filter_links(collect_link_candidates(driver), seen, results)
+                 phases.lap("fallback_scan")
+
+            if self.snapshots is not None:
+                self.save_snapshot(query, driver.page_source, driver.current_url)
+                phases.lap("snapshot")
+
+            self.report("ok" if results else "empty")
 
+        except SearchBlocked:
+            raise
         except Exception as e:
+            instrumentation.count("scrape_errors", engine=self.name)
             logging.error(f"Error scraping '{query}': {str(e)[:100]}")
 
         return results
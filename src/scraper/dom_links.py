@@ -0,0 +1,40 @@
+from collections import namedtuple
+
+# One anchor on a SERP: resolved href, position among the scanned anchors,
+# and whether it matches the engine's link_selector (a result link)
+LinkCandidate = namedtuple("LinkCandidate", ["href", "rank", "in_result"])
+
+COLLECT_LINKS_SCRIPT = """
+const root = arguments[0] || document;
+const linkSelector = arguments[1];
+const out = [];
+const anchors = root.querySelectorAll('a');
+for (let i = 0; i < anchors.length; i++) {
+    const a = anchors[i];
+    const href = typeof a.href === 'string' ? a.href : a.getAttribute('href');
+    if (!href) continue;
+    let inResult = false;
+    if (linkSelector) {
+        try { inResult = a.matches(linkSelector); } catch (e) {}
+    }
+    out.push([href, i, inResult]);
+}
+return out;
+"""
+
+
+def collect_link_candidates(driver, root=None, link_selector=None) -> list:
+    """
+    Every anchor under `root` (the whole document if None) in DOM order, fetched with a
+    single execute_script round-trip instead of one get_attribute call per element.
+    """
+    rows = driver.execute_script(COLLECT_LINKS_SCRIPT, root, link_selector) or []
+    return [LinkCandidate(*row) for row in rows]
+
+
+def result_links_first(candidates) -> list:
+    """
+    Candidates matching the link_selector, then every candidate in DOM order (the lxml extraction
+    order), so result links fill the limit before navigation or sidebar anchors do.
+    """
+    return [c for c in candidates if c.in_result] + list(candidates)
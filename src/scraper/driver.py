@@ -1,10 +1,47 @@
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
-def setup_driver(headless_mode: bool, user_agent: str):
+# Sub-resources a SERP does not need when only anchor hrefs are read
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+]
+
+def _apply_lean_profile(options, profile: dict, slot: int = None):
+    options.page_load_strategy = profile.get("page_load_strategy", "eager")
+    if profile.get("block_resources", True):
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    if profile.get("disk_cache_dir"):
+        # Chrome expects one cache per process, so every pool slot gets its own subdirectory
+        cache_dir = profile["disk_cache_dir"]
+        if slot is not None:
+            cache_dir = os.path.join(cache_dir, f"slot-{slot}")
+        os.makedirs(cache_dir, exist_ok=True)
+        options.add_argument(f"--disk-cache-dir={cache_dir}")
+        options.add_argument(f"--disk-cache-size={profile.get('disk_cache_size', 256 * 1024 * 1024)}")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--mute-audio")
+
+def setup_driver(headless_mode: bool, user_agent: str, profile: dict = None, slot: int = None):
     """
     Sets up the Chrome WebDriver with the specified options.
+    A `profile` with `lean: true` uses an eager/none page-load strategy, blocks images, fonts
+    and media, and can point Chrome at a persistent disk cache (per DriverPool `slot`).
     """
+    lean = bool(profile and profile.get("lean"))
     options = Options()
 
     if headless_mode:
@@ -22,6 +59,151 @@ def setup_driver(headless_mode: bool, user_agent: str):
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
 
+    if lean:
+        _apply_lean_profile(options, profile, slot)
+
     driver = webdriver.Chrome(options=options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    if lean and profile.get("block_resources", True):
+        # Fonts and media have no content setting; drop them at the network layer
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
     return driver
+
+def browser_rss_mb(driver):
+    """
+    Resident memory (MB) of the chromedriver process tree behind `driver`, or None where
+    /proc is unavailable.
+    """
+    try:
+        pids = [driver.service.process.pid]
+    except AttributeError:
+        return None
+
+    total_kb = 0
+    seen = set()
+    while pids:
+        pid = pids.pop()
+        if pid in seen: continue
+        seen.add(pid)
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            with open(f"/proc/{pid}/task/{pid}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024 if seen and total_kb else None
+
+
+class DriverPool:
+    """
+    Thread-safe pool of WebDriver instances. Drivers are created lazily by `factory(slot)`
+    (at most `size` of them, each in its own slot 0..size-1) and handed out one caller at a time.
+    With `recycle_after`, a driver is quit and replaced after that many pages, capping the
+    memory growth of long-lived Chrome processes.
+    """
+
+    def __init__(self, size: int, factory, recycle_after: int = None):
+        self.size = max(1, size)
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._uses = {}
+        self._slots = {}
+        self._free_slots = list(range(self.size))
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                slot = self._free_slots.pop(0) if self._free_slots else None
+            if slot is not None:
+                return self._launch(slot)
+            # Poll, since a recycled driver frees a slot without returning to the idle queue
+            wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def _launch(self, slot):
+        """Starts a driver in a reserved slot; Chrome takes seconds to start, so not under the lock."""
+        try:
+            driver = self.factory(slot)
+        except BaseException:
+            with self._lock:
+                self._free_slots.insert(0, slot)
+            raise
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._all.append(driver)
+                self._slots[id(driver)] = slot
+        if closed:
+            self._quit(driver)
+            raise RuntimeError("DriverPool is closed")
+        return driver
+
+    def release(self, driver):
+        with self._lock:
+            owned = driver in self._all
+            uses = self._uses.get(id(driver), 0) + 1
+            recycle = owned and bool(self.recycle_after) and uses >= self.recycle_after
+            if recycle:
+                self._all.remove(driver)
+                self._uses.pop(id(driver), None)
+                self._free_slots.append(self._slots.pop(id(driver)))
+            elif owned:
+                self._uses[id(driver)] = uses
+
+        if not owned:
+            # The pool was closed while this driver was in use
+            self._quit(driver)
+        elif recycle:
+            rss = browser_rss_mb(driver)
+            logging.info(f"Recycling driver after {uses} pages" + (f" (browser RSS: {rss:.0f} MB)" if rss else ""))
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers, self._all = self._all, []
+            self._uses.clear()
+            self._slots.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            self._quit(driver)
@@ -0,0 +1,61 @@
+from functools import lru_cache
+from urllib.parse import urljoin
+import lxml.html
+from lxml.cssselect import CSSSelector
+from .base_engine import CAPTCHA_MARKERS
+from .dom_links import LinkCandidate
+
+ALL_ANCHORS = "a"
+
+
+@lru_cache(maxsize=None)
+def compile_selector(css: str) -> CSSSelector:
+    """CSS selectors from the config are compiled to XPath once per process."""
+    return CSSSelector(css)
+
+
+def parse_html(html: str):
+    return lxml.html.document_fromstring(html)
+
+
+def is_blocked_page(doc) -> bool:
+    body = doc.find("body")
+    text = (body if body is not None else doc).text_content().lower()
+    return any(marker in text for marker in CAPTCHA_MARKERS)
+
+
+def candidate_links(doc, config: dict, page_url: str, page_fallback: bool = False) -> tuple:
+    """
+    LinkCandidates in priority order: the engine's `link_selector` inside its container, then every
+    anchor in the container, then, with `page_fallback`, every anchor on the page (the Selenium
+    global fallback order). Returns (candidates, container_found).
+    """
+    containers = compile_selector(config["container"])(doc)
+    anchors = []
+    if containers:
+        container = containers[0]
+        if config.get("link_selector"):
+            anchors += [(a, True) for a in compile_selector(config["link_selector"])(container)]
+        anchors += [(a, False) for a in compile_selector(ALL_ANCHORS)(container)]
+    if page_fallback:
+        anchors += [(a, False) for a in compile_selector(ALL_ANCHORS)(doc)]
+
+    candidates = [LinkCandidate(urljoin(page_url, a.get("href")), rank, in_result)
+                  for rank, (a, in_result) in enumerate(anchors) if a.get("href")]
+    return candidates, bool(containers)
+
+
+def extract_links(engine, html: str, page_url: str, page_fallback: bool = False) -> tuple:
+    """
+    Extracts up to `engine.limit` result links from raw SERP HTML, applying the engine's
+    `process_link` decoding and `is_valid` filter. `page_fallback` tops the links up from the
+    whole document like the Selenium path does; without it a page with no container yields none.
+    Returns (links, status) where status is "ok", "blocked" or "no_container".
+    """
+    doc = parse_html(html)
+    if is_blocked_page(doc):
+        return [], "blocked"
+
+    candidates, container_found = candidate_links(doc, engine.config, page_url, page_fallback)
+    results = engine.filter_links(candidates, set())
+    return results, "ok" if container_found else "no_container"
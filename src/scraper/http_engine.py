@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from collections import deque
+import aiohttp
+from .extraction import extract_links
+from src.utils import instrumentation
+
+RETRY_IN_BROWSER_STATUS = {403, 429, 503}
+
+
+class HTTPSearchBackend:
+    """
+    Browserless SERP fetching: plain HTTP GETs over one pooled aiohttp session, with link
+    extraction done by lxml using each engine's configured selectors.
+    Queries whose page is blocked, needs JavaScript (no container, no links) or fails to
+    load are handed back so the caller can retry them through the Selenium `search` path.
+    """
+
+    def __init__(self, engines: dict, concurrency: dict = None, user_agent: str = None, timeout: float = 15):
+        self.engines = engines
+        self.concurrency = concurrency or {}
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+    async def _fetch(self, session, engine_name, engine, query):
+        url = engine.build_url(query)
+        try:
+            with instrumentation.span("http_fetch", engine=engine_name):
+                async with session.get(url) as response:
+                    if response.status in RETRY_IN_BROWSER_STATUS:
+                        engine.report("throttled" if response.status == 429 else "blocked")
+                        instrumentation.count("http_deferred", engine=engine_name, reason=str(response.status))
+                        logging.warning(f"[{engine_name}] HTTP {response.status} for '{query}', deferring to browser.")
+                        return None
+                    html = await response.text(errors="replace")
+                    page_url = str(response.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            instrumentation.count("http_deferred", engine=engine_name, reason="error")
+            logging.warning(f"[{engine_name}] Fetch failed for '{query}' ({str(e)[:100]}), deferring to browser.")
+            return None
+
+        engine.save_snapshot(query, html, page_url)
+        with instrumentation.span("http_extract", engine=engine_name):
+            links, status = extract_links(engine, html, page_url)
+        if status == "blocked":
+            instrumentation.count("captcha_detections", engine=engine_name)
+        engine.report("blocked" if status == "blocked" else "ok" if links else "empty")
+        if status != "ok" or not links:
+            instrumentation.count("http_deferred", engine=engine_name, reason=status if status != "ok" else "no_links")
+            logging.info(f"[{engine_name}] Page for '{query}' is {status} with {len(links)} links, deferring to browser.")
+            return None
+        return links
+
+    async def _worker(self, session, engine_name, engine, queries, on_result, deferred):
+        while queries:
+            query = queries.popleft()
+            await asyncio.sleep(engine.next_delay())
+            links = await self._fetch(session, engine_name, engine, query)
+            if links is None:
+                deferred[engine_name].append(query)
+            elif on_result:
+                on_result(engine_name, query, links)
+
+    async def _run(self, pending, on_result):
+        deferred = {name: [] for name in pending}
+        headers = {"User-Agent": self.user_agent} if self.user_agent else None
+        connector = aiohttp.TCPConnector(limit=sum(max(1, self.concurrency.get(n, 1)) for n in pending) or 1,
+                                         ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as session:
+            workers = []
+            for engine_name, queries in pending.items():
+                queue = deque(queries)
+                for _ in range(max(1, self.concurrency.get(engine_name, 1))):
+                    workers.append(self._worker(session, engine_name, self.engines[engine_name],
+                                                queue, on_result, deferred))
+            await asyncio.gather(*workers)
+        return deferred
+
+    def run(self, pending: dict, on_result=None) -> dict:
+        """
+        Scrapes `pending` ({engine name: [queries]}), reporting each success through `on_result`.
+        Returns the {engine name: [queries]} that must be retried in a browser.
+        """
+        return asyncio.run(self._run(pending, on_result))
@@ -0,0 +1,94 @@
+import re
+
+# The rules BaseEngine.is_valid used to hardcode; config/experiment.yaml `link_filter` overrides them
+DEFAULT_LINK_FILTER = {
+    "forbidden_terms": ["aclick", "login", "signup", "preferences", "settings", "privacy", "terms", "cookie",
+                        "advertisement", "form=", "adurl"],
+    "search_patterns": ["/search?", "search.", "bing.com/search", "google.com/search"],
+    "blocked_domains": [],
+    "allowed_domains": [],
+}
+
+# Rejection reasons
+REASONS = ("empty", "not_http", "duplicate", "search_page", "forbidden_term", "blocked_domain", "not_allowed_domain")
+
+
+def trie_pattern(terms):
+    """
+    Regex alternation of literal `terms` factored into a prefix trie, so each position of the
+    scanned string is tried against the first characters once (a regex-engine stand-in for
+    Aho-Corasick). A term that extends another one is dropped: the shorter match suffices.
+    """
+    trie = {}
+    for term in sorted(set(terms) - {""}):
+        node = trie
+        for ch in term:
+            if node.get("") is True: break
+            node = node.setdefault(ch, {})
+        else:
+            node.clear()
+            node[""] = True
+
+    def build(node):
+        if node.get("") is True:
+            return ""
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        return alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+
+    return build(trie) if trie else None
+
+
+def _domain_pattern(domains):
+    """Matches a host equal to, or a subdomain of, any of `domains`."""
+    if not domains:
+        return None
+    return re.compile(r"(?:^|\.)(?:" + "|".join(re.escape(d.lower().lstrip(".")) for d in domains) + r")$")
+
+
+def _host(link):
+    """Lowercased host of an absolute http(s) URL, without credentials or port."""
+    netloc = link.split("/", 3)[2] if link.count("/") >= 2 else ""
+    return netloc.rpartition("@")[2].split(":", 1)[0].lower()
+
+
+class LinkFilter:
+    """
+    Decides which extracted links are kept as results. Forbidden terms and search-page patterns
+    are compiled into one trie-factored regex, so every link costs a single scan, and the
+    leftmost matched term gives the rejection reason. Domain rules match the host and its subdomains.
+    """
+
+    def __init__(self, forbidden_terms=(), search_patterns=(), blocked_domains=(), allowed_domains=()):
+        # With no terms the scan is a pattern that never matches
+        self._scan = re.compile(trie_pattern(list(forbidden_terms) + list(search_patterns)) or "(?!)").search
+        # Matched term -> reason; a term listed as both counts as a search page
+        self._reasons = {term: "forbidden_term" for term in forbidden_terms}
+        self._reasons.update({term: "search_page" for term in search_patterns})
+        self._blocked = _domain_pattern(blocked_domains)
+        self._allowed = _domain_pattern(allowed_domains)
+        self._check_domains = bool(self._blocked or self._allowed)
+
+    @classmethod
+    def from_config(cls, settings=None, override=None):
+        """
+        Filter from the `link_filter` config section, with an engine's own `link_filter` section
+        replacing individual keys. Missing keys keep the DEFAULT_LINK_FILTER rules.
+        """
+        merged = {**DEFAULT_LINK_FILTER, **(settings or {}), **(override or {})}
+        return cls(**merged)
+
+    def rejection(self, link, seen=()):
+        """Reason `link` is rejected (one of REASONS), or None when it is kept."""
+        if not link: return "empty"
+        if not link.startswith("http"): return "not_http"
+        if link in seen: return "duplicate"
+        match = self._scan(link)
+        if match: return self._reasons[match.group()]
+        if self._check_domains:
+            host = _host(link)
+            if self._blocked and self._blocked.search(host): return "blocked_domain"
+            if self._allowed and not self._allowed.search(host): return "not_allowed_domain"
+        return None
+
+    def is_valid(self, link, seen=()):
+        return self.rejection(link, seen) is None
@@ -0,0 +1,90 @@
+import os
+import json
+import math
+import time
+import random
+import threading
+from src.utils.locking import LockedState
+
+# Response outcomes reported to a pacer; every one but "ok" backs it off
+OUTCOMES = ("ok", "empty", "blocked", "throttled")
+
+
+class AdaptivePacer(LockedState):
+    """
+    Paces one engine's requests with an AIMD rate (requests/s): every clean response adds
+    `increase`, a CAPTCHA, HTTP 429 or empty result page multiplies the rate by `decrease`.
+    Requests are spaced like a token bucket of `burst` tokens refilled at the current rate, each
+    gap jittered by +/- `jitter`. next_delay() reserves a slot, so concurrent workers of one
+    engine share its rate.
+    """
+
+    def __init__(self, rate, min_rate=0.02, max_rate=1.0, increase=0.01, decrease=0.5, jitter=0.3, burst=1,
+                 clock=time.monotonic):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tat = 0.0  # theoretical arrival time of the next request (GCRA)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings=None, min_delay=4, max_delay=8, rate=None):
+        """
+        Pacer from the `experiment.pacing` config section. It starts at `rate` (a persisted one),
+        else `initial_rate`, else the mean rate of the old fixed min_delay..max_delay sleep.
+        """
+        if max_delay <= 0:
+            # No delay configured (e.g. the offline fixture server): requests are not paced
+            return cls(math.inf, min_rate=math.inf, max_rate=math.inf)
+        settings = dict(settings or {})
+        initial = settings.pop("initial_rate", None)
+        return cls(rate or initial or 2 / (min_delay + max_delay), **settings)
+
+    def next_delay(self):
+        """Seconds to wait before sending the next request; the slot is reserved on return."""
+        with self._lock:
+            now = self.clock()
+            interval = random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+            send_at = max(now, self._tat - (self.burst - 1) * interval)
+            self._tat = max(self._tat, send_at) + interval
+            return send_at - now
+
+    def record(self, outcome):
+        """Adapts the rate to a response outcome (one of OUTCOMES). Returns the new rate."""
+        with self._lock:
+            if outcome == "ok":
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            else:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                # Back off now, not only after the slots already handed out at the old rate
+                self._tat = max(self._tat, self.clock() + 1 / self.rate)
+            return self.rate
+
+
+def load_rates(path) -> dict:
+    """{engine: requests/s} learned by earlier runs; empty when there is no state yet."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {engine: entry["rate"] for engine, entry in json.load(f).items()}
+
+
+def save_rates(path, pacers: dict):
+    """Persists each pacer's current rate, keeping the entries of engines not in `pacers`."""
+    state = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    for engine, pacer in pacers.items():
+        if not math.isfinite(pacer.rate): continue
+        state[engine] = {"rate": pacer.rate, "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,77 @@
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.snapshot_store import read_snapshot
+from src.utils import instrumentation
+from .extraction import extract_links
+
+# Pages per task sent to a worker process
+BATCH_SIZE = 200
+# Page statuses with nothing to extract: their queries get no record, so --resume scrapes them again
+SKIPPED_STATUSES = {"blocked", "missing"}
+
+_worker_state = {}
+
+
+def _init_worker(engines, root):
+    """Engines (selectors + link filter) are pickled once per worker, not once per batch."""
+    _worker_state.update(engines=engines, root=root)
+
+
+def extract_batch(engine_name, entries, engines=None, root=None):
+    """
+    [(query, links, status)] for archived pages given as (query, digest, url) entries.
+    Pages with the same content and URL are parsed once. Links are topped up from the whole page
+    like the browser's global fallback, which scraped the archived page unless the HTTP backend
+    accepted it.
+    """
+    engine = (engines or _worker_state["engines"])[engine_name]
+    root = root or _worker_state["root"]
+    done = {}
+    out = []
+    for query, digest, url in entries:
+        if (digest, url) not in done:
+            try:
+                done[(digest, url)] = extract_links(engine, read_snapshot(root, digest), url or "",
+                                                       page_fallback=True)
+            except OSError as e:
+                logging.warning(f"[{engine_name}] Snapshot {digest} for '{query}' is unreadable: {e}")
+                done[(digest, url)] = ([], "missing")
+        links, status = done[(digest, url)]
+        out.append((query, list(links), status))
+    return out
+
+
+def reextract_run(engines: dict, store, run: str, on_result=None, workers: int = 1, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Re-runs link extraction for every page archived in `run`, with the current selectors and
+    link filter of `engines` and no browser. Results reach `on_result(engine, query, links)` in
+    save order; blocked and unreadable pages are only counted. Returns {engine name: Counter
+    of page statuses}.
+    """
+    jobs = []
+    for engine_name in engines:
+        entries = store.entries(run, engine_name)
+        logging.info(f"[{engine_name}] {len(entries)} archived pages in run {run}.")
+        jobs += [(engine_name, entries[i:i + batch_size]) for i in range(0, len(entries), batch_size)]
+
+    executor = None
+    if workers > 1 and len(jobs) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(engines, store.root))
+        batches = executor.map(extract_batch, *zip(*jobs))
+    else:
+        batches = (extract_batch(name, entries, engines, store.root) for name, entries in jobs)
+
+    statuses = {engine_name: Counter() for engine_name in engines}
+    try:
+        for (engine_name, _), results in zip(jobs, batches):
+            for query, links, status in results:
+                statuses[engine_name][status] += 1
+                instrumentation.count("reextract_pages", engine=engine_name, status=status)
+                if on_result and status not in SKIPPED_STATUSES:
+                    on_result(engine_name, query, links)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return statuses
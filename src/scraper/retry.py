@@ -0,0 +1,155 @@
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from src.utils.locking import LockedState
+
+
+class SearchBlocked(Exception):
+    """Raised by BaseEngine.search when the engine serves a CAPTCHA / bot check instead of results."""
+
+
+class RetryPolicy:
+    """
+    How blocked queries are retried: a blocked query waits `backoff * 2^(attempt - 1)` seconds
+    (capped at `max_backoff`, with up to +50% jitter) and is dropped after `max_attempts` blocks.
+    An engine's circuit opens after `breaker_threshold` consecutive blocks, for `breaker_cooldown`
+    seconds doubling per trip up to `breaker_max_cooldown`; after `give_up_after_trips` trips
+    without a success, the engine's remaining queries are abandoned.
+    """
+
+    def __init__(self, max_attempts=4, backoff=30, max_backoff=600, breaker_threshold=3, breaker_cooldown=120,
+                 breaker_max_cooldown=1800, give_up_after_trips=5):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_cooldown = breaker_max_cooldown
+        self.give_up_after_trips = give_up_after_trips
+
+    @classmethod
+    def from_config(cls, settings=None):
+        """Policy from the `experiment.captcha` config section; missing keys keep the defaults."""
+        settings = {k: v for k, v in (settings or {}).items() if k != "interactive"}
+        return cls(**settings)
+
+    def delay(self, attempt):
+        """Quarantine time after the `attempt`-th block of a query."""
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * random.uniform(1.0, 1.5)
+
+
+class CircuitBreaker(LockedState):
+    """
+    Per-engine breaker. Closed: queries flow. Open: nothing is sent until the cooldown ends.
+    Half-open: a single probe query is let through; a success closes the circuit, a block
+    re-opens it with a doubled cooldown.
+    """
+
+    def __init__(self, policy: RetryPolicy, clock=time.monotonic):
+        self.policy = policy
+        self.clock = clock
+        self.consecutive_blocks = 0
+        self.trips = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        return self.trips >= self.policy.give_up_after_trips
+
+    def acquire(self):
+        """0 when a query may be sent now (taking the probe slot when half-open), else seconds to wait."""
+        with self._lock:
+            wait = self._open_until - self.clock()
+            if wait > 0:
+                return wait
+            if self.trips:
+                if self._probing:
+                    return self.policy.breaker_cooldown / 10
+                self._probing = True
+            return 0.0
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_blocks = 0
+            self.trips = 0
+            self._probing = False
+
+    def record_block(self) -> bool:
+        """Counts a block; returns True when it (re-)opens the circuit."""
+        with self._lock:
+            self.consecutive_blocks += 1
+            probe_failed = self._probing
+            self._probing = False
+            if not probe_failed and self.consecutive_blocks < self.policy.breaker_threshold:
+                return False
+            self.trips += 1
+            cooldown = min(self.policy.breaker_max_cooldown, self.policy.breaker_cooldown * 2 ** (self.trips - 1))
+            self._open_until = self.clock() + cooldown
+            return True
+
+    def release(self):
+        """Frees the probe slot when a taken query was not sent (e.g. on shutdown)."""
+        with self._lock:
+            self._probing = False
+
+
+class RetryQueue(LockedState):
+    """
+    One engine's work: fresh queries in order, plus blocked ones quarantined until their
+    backoff has passed. Quarantined queries are served before fresh ones once they are due.
+    """
+
+    def __init__(self, queries, clock=time.monotonic):
+        self.clock = clock
+        self._fresh = deque((query, 0) for query in queries)
+        self._quarantine = []  # heap of (due time, seq, query, attempts)
+        self._seq = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        ((query, attempts), None) for the next due query, or (None, wait) where wait is the seconds
+        until one could be due, and None once the queue is drained.
+        """
+        with self._lock:
+            now = self.clock()
+            if self._quarantine and self._quarantine[0][0] <= now:
+                _, _, query, attempts = heapq.heappop(self._quarantine)
+            elif self._fresh:
+                query, attempts = self._fresh.popleft()
+            elif self._quarantine:
+                return None, self._quarantine[0][0] - now
+            else:
+                return None, (1.0 if self._in_flight else None)
+            self._in_flight += 1
+            return (query, attempts), None
+
+    def done(self, item):
+        with self._lock:
+            self._in_flight -= 1
+
+    def put_back(self, item):
+        """Returns a taken query, untried, to the front of the queue."""
+        with self._lock:
+            self._in_flight -= 1
+            self._fresh.appendleft(item)
+
+    def quarantine(self, item, delay):
+        query, attempts = item
+        with self._lock:
+            self._in_flight -= 1
+            self._seq += 1
+            heapq.heappush(self._quarantine, (self.clock() + delay, self._seq, query, attempts + 1))
+
+    def drain(self):
+        """Removes and returns every query not yet scraped."""
+        with self._lock:
+            queries = [query for query, _ in self._fresh] + [entry[2] for entry in self._quarantine]
+            self._fresh.clear()
+            self._quarantine.clear()
+            return queries
@@ -0,0 +1,150 @@
+import time
+import logging
+import threading
+from src.utils import instrumentation
+from .retry import SearchBlocked, RetryPolicy, CircuitBreaker, RetryQueue
+
+# Longest a worker sleeps before re-checking its queue, breaker and the stop flag
+MAX_IDLE_WAIT = 5.0
+# Longest run() waits, after an interrupt, for workers to finish their current query
+STOP_TIMEOUT = 60.0
+
+
+class ScrapeScheduler:
+    """
+    Runs several engines concurrently over a shared DriverPool.
+    Each engine gets `concurrency[engine]` worker threads pulling from its own RetryQueue,
+    and a worker only holds a driver while a page is being scraped, so one engine's
+    politeness delay never blocks the others.
+    A blocked query is quarantined and retried with exponential backoff; repeated blocks
+    open the engine's CircuitBreaker, pausing that engine only, while the others keep going.
+    """
+
+    def __init__(self, engines: dict, pool, concurrency: dict = None, on_result=None, retry: RetryPolicy = None):
+        self.engines = engines
+        self.pool = pool
+        self.concurrency = concurrency or {}
+        self.on_result = on_result
+        self.retry = retry or RetryPolicy()
+        # Queries given up on, per engine; they have no result, so --resume retries them
+        self.abandoned = {}
+        self._stop = threading.Event()
+        self._result_lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+
+    def _idle(self, wait):
+        self._stop.wait(min(wait, MAX_IDLE_WAIT))
+
+    def _retry_later(self, engine_name, work, item, what):
+        """Quarantines a query with backoff, or gives up on it once it has used its attempts."""
+        query, attempts = item
+        if attempts + 1 >= self.retry.max_attempts:
+            work.done(item)
+            self._abandon(engine_name, [query])
+            logging.warning(f"[{engine_name}] Giving up on '{query}' after {attempts + 1} attempts.")
+        else:
+            delay = self.retry.delay(attempts + 1)
+            work.quarantine(item, delay)
+            logging.info(f"[{engine_name}] {what} on '{query}', retrying in {delay:.0f}s.")
+
+    def _on_blocked(self, engine_name, work, breaker, item):
+        instrumentation.count("queries_blocked", engine=engine_name)
+        if breaker.record_block():
+            instrumentation.count("circuit_trips", engine=engine_name)
+            logging.warning(f"[{engine_name}] Circuit open after {breaker.consecutive_blocks} consecutive blocks "
+                            f"(trip {breaker.trips}); other engines continue.")
+
+        self._retry_later(engine_name, work, item, "Blocked")
+        if breaker.exhausted:
+            dropped = work.drain()
+            self._abandon(engine_name, dropped)
+            logging.error(f"[{engine_name}] Still blocked after {breaker.trips} circuit trips; "
+                          f"abandoning its {len(dropped)} remaining queries.")
+
+    def _abandon(self, engine_name, queries):
+        if not queries: return
+        instrumentation.count("queries_abandoned", len(queries), engine=engine_name)
+        with self._result_lock:
+            self.abandoned.setdefault(engine_name, []).extend(queries)
+
+    def _worker(self, engine_name, engine, work, breaker):
+        while not self._stop.is_set():
+            item, wait = work.take()
+            if item is None:
+                if wait is None: return
+                self._idle(wait)
+                continue
+            wait = breaker.acquire()
+            if wait > 0:
+                work.put_back(item)
+                self._idle(wait)
+                continue
+
+            # Politeness delay, cut short by stop()
+            self._stop.wait(engine.next_delay())
+            if self._stop.is_set():
+                breaker.release()
+                work.put_back(item)
+                return
+
+            query = item[0]
+            logging.info(f"Searching {engine_name}: {query}")
+            try:
+                with instrumentation.span("scrape_query", engine=engine_name):
+                    with self.pool.driver() as driver:
+                        results = engine.search(query, driver, throttle=False)
+                breaker.record_success()
+                logging.info(f"[{engine_name}] Found {len(results)} links.")
+
+                if self.on_result:
+                    with self._result_lock:
+                        self.on_result(engine_name, query, results)
+                work.done(item)
+            except SearchBlocked:
+                self._on_blocked(engine_name, work, breaker, item)
+            except Exception as e:
+                # e.g. a browser that fails to start or a result that cannot be written:
+                # the query keeps its place in the retry budget instead of killing the worker
+                instrumentation.count("worker_errors", engine=engine_name)
+                logging.error(f"[{engine_name}] Worker error on '{query}': {str(e)[:200]}")
+                breaker.release()
+                self._retry_later(engine_name, work, item, "Failed")
+
+    def run(self, pending: dict):
+        """
+        Scrapes `pending` ({engine name: [queries]}) and blocks until done.
+        Queries that stayed blocked or kept failing end up in `abandoned`.
+        A KeyboardInterrupt stops the workers after their current query and is re-raised once
+        they have exited (or STOP_TIMEOUT has passed), so no driver or store is still in use.
+        """
+        threads = []
+        for engine_name, queries in pending.items():
+            if not queries: continue
+            work = RetryQueue(queries)
+            breaker = CircuitBreaker(self.retry)
+            n_workers = max(1, min(self.concurrency.get(engine_name, 1), len(queries)))
+            for i in range(n_workers):
+                thread = threading.Thread(target=self._worker,
+                                          args=(engine_name, self.engines[engine_name], work, breaker),
+                                          name=f"{engine_name}-{i}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            self._join(threads, STOP_TIMEOUT)
+            raise
+
+    def _join(self, threads, timeout):
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        busy = [thread.name for thread in threads if thread.is_alive()]
+        if busy:
+            logging.warning(f"Workers still busy after {timeout:.0f}s: {', '.join(busy)}")
@@ -0,0 +1,132 @@
+import os
+import numpy as np
+from src.utils.url_table import URLTable
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError as e:
+    raise ImportError("Parquet/Arrow output needs pyarrow, an optional dependency: "
+                      "pip install -e \".[columnar]\" (or pip install pyarrow), or use --output-format csv") from e
+
+# Output format -> file extension
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+URL_ID_COLUMNS = ["Baseline IDs", "Result IDs"]
+
+
+def results_schema(engines: list, metric_columns: list, with_url_ids: bool = False) -> pa.Schema:
+    """Engine is dictionary-encoded, metrics are float32 and ranked lists are list<int32> URL IDs."""
+    fields = [pa.field("Engine", pa.dictionary(pa.int8(), pa.string())), pa.field("Query", pa.string())]
+    fields += [pa.field(col, pa.float32()) for col in metric_columns]
+    if with_url_ids:
+        fields += [pa.field(col, pa.list_(pa.int32())) for col in URL_ID_COLUMNS]
+    return pa.schema(fields, metadata={"engines": ",".join(engines)})
+
+
+def _id_lists(url_table: URLTable, url_lists) -> pa.ListArray:
+    ids = [np.asarray(url_table.encode(urls), dtype=np.int32) for urls in url_lists]
+    offsets = np.zeros(len(ids) + 1, dtype=np.int32)
+    np.cumsum([len(a) for a in ids], out=offsets[1:])
+    values = np.concatenate(ids) if ids else np.array([], dtype=np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values, type=pa.int32()))
+
+
+class ColumnarResultsWriter:
+    """
+    Writes evaluation rows to a Parquet or Arrow IPC file, grouped by engine in `engines` order
+    (the CSV row order). Rows are staged per engine in Arrow stream part files, so batches can
+    arrive interleaved (as in streaming evaluation) without being held in memory.
+    With `with_url_ids`, the ranked lists are stored as IDs into `<name>_urls.<ext>`.
+    """
+
+    def __init__(self, path: str, engines: list, metric_columns: list, fmt: str = "parquet",
+                 with_url_ids: bool = False):
+        if fmt not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.engines = list(engines)
+        self.metric_columns = list(metric_columns)
+        self.schema = results_schema(self.engines, self.metric_columns, with_url_ids)
+        self.url_table = URLTable() if with_url_ids else None
+        # Every batch shares one dictionary, which the IPC file format requires
+        self._engine_dictionary = pa.array(self.engines, type=pa.string())
+        self._parts = {}
+
+    def write(self, engine: str, frame, baseline_lists=None, target_lists=None):
+        """Appends the rows of `frame` (metrics_frame layout) for one engine."""
+        index = self.engines.index(engine)
+        columns = [
+            pa.DictionaryArray.from_arrays(pa.array(np.full(len(frame), index, dtype=np.int8)),
+                                           self._engine_dictionary),
+            pa.array(frame["Query"].tolist(), type=pa.string()),
+        ]
+        columns += [pa.array(frame[col].to_numpy(dtype=np.float32)) for col in self.metric_columns]
+        if self.url_table is not None:
+            columns += [_id_lists(self.url_table, baseline_lists), _id_lists(self.url_table, target_lists)]
+        batch = pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+        if engine not in self._parts:
+            part_path = f"{self.path}.{index}.part"
+            self._parts[engine] = (part_path, ipc.new_stream(part_path, self.schema))
+        self._parts[engine][1].write_batch(batch)
+
+    def close(self):
+        """Assembles the part files into the final file (engine-major) and writes the URL dictionary."""
+        for _, part_writer in self._parts.values():
+            part_writer.close()
+
+        if self.fmt == "parquet":
+            writer = pq.ParquetWriter(self.path, self.schema)
+        else:
+            writer = ipc.new_file(self.path, self.schema)
+        try:
+            for engine in self.engines:
+                if engine not in self._parts: continue
+                part_path, _ = self._parts[engine]
+                with pa.memory_map(part_path) as source:
+                    for batch in ipc.open_stream(source):
+                        writer.write_batch(batch)
+                os.remove(part_path)
+        finally:
+            writer.close()
+        self._parts = {}
+
+        if self.url_table is not None:
+            urls = pa.table({"URL": pa.array(self.url_table.decode(range(len(self.url_table))), type=pa.string())})
+            write_table(urls, url_dictionary_path(self.path), self.fmt)
+
+
+def url_dictionary_path(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}_urls{ext}"
+
+
+def write_table(table: pa.Table, path: str, fmt: str):
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+
+
+def load_results_table(path: str, columns: list = None) -> pa.Table:
+    """
+    Opens a columnar results file memory-mapped. Arrow IPC files are zero-copy: only the pages of
+    the requested columns are ever read. Parquet is decoded, but only for the requested columns.
+    """
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    table = ipc.open_file(pa.memory_map(path)).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def load_results_frame(path: str, columns: list = None):
+    """load_results_table as a pandas DataFrame (Engine becomes a categorical column)."""
+    return load_results_table(path, columns).to_pandas()
+
+
+def load_url_dictionary(path: str) -> pa.Array:
+    """The (normalized) URL dictionary of a results file; the URL with ID i is element i."""
+    return load_results_table(url_dictionary_path(path), ["URL"]).column("URL").combine_chunks()
@@ -0,0 +1,209 @@
+import json
+import math
+import time
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus-style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+METRIC_PREFIX = "searchrank_"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with count, sum, min and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum, "min": self.min if self.count else None,
+                "max": self.max if self.count else None, "p50": self.quantile(0.5), "p95": self.quantile(0.95),
+                "buckets": {("+Inf" if math.isinf(b) else str(b)): n for b, n in zip(self.buckets, self.counts)}}
+
+
+class _NoOp:
+    """Shared do-nothing span/timer returned while instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def lap(self, stage):
+        pass
+
+
+_NOOP = _NoOp()
+
+
+class _Span:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class StageTimer:
+    """Times consecutive stages: each `lap(stage)` records the time since the previous lap."""
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.registry.observe(self.name, now - self.last, self.labels + (("stage", stage),))
+        self.last = now
+
+
+class Registry:
+    """
+    Process-wide spans (latency histograms) and counters, keyed by name and label set.
+    Disabled by default: span(), stage_timer() and count() then return immediately.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def observe(self, name, seconds, labels=()):
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, value=1, labels=()):
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "histograms": [{"name": name, "labels": dict(labels), **h.to_dict()}
+                               for (name, labels), h in sorted(self.histograms.items())],
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+            }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format: histograms as _bucket/_sum/_count, counters as _total."""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.histograms}):
+                metric = f"{METRIC_PREFIX}{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (h_name, labels), h in sorted(self.histograms.items()):
+                    if h_name != name: continue
+                    cumulative = 0
+                    for bound, n in zip(h.buckets, h.counts):
+                        cumulative += n
+                        le = "+Inf" if math.isinf(bound) else repr(bound)
+                        lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_labels(labels)} {h.sum}")
+                    lines.append(f"{metric}_count{_labels(labels)} {h.count}")
+            for name in sorted({name for name, _ in self.counters}):
+                metric = f"{METRIC_PREFIX}{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (c_name, labels), value in sorted(self.counters.items()):
+                    if c_name == name:
+                        lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """One human-readable line per histogram and counter, for the end-of-run log."""
+        lines = []
+        with self._lock:
+            for (name, labels), h in sorted(self.histograms.items()):
+                lines.append(f"{name}{_labels(labels)}: n={h.count} total={h.sum:.2f}s "
+                             f"mean={h.sum / h.count:.3f}s p95<={h.quantile(0.95):.3f}s max={h.max:.3f}s")
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{name}{_labels(labels)}: {value}")
+        return lines
+
+    def dump(self, path_prefix):
+        """Writes `<path_prefix>.json` and `<path_prefix>.prom`; returns their paths."""
+        json_path, prom_path = f"{path_prefix}.json", f"{path_prefix}.prom"
+        with open(json_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2, default=str)
+        with open(prom_path, "w") as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+REGISTRY = Registry()
+
+
+def enable(enabled=True):
+    REGISTRY.enabled = enabled
+
+
+def span(name, **labels):
+    """Context manager recording its duration into the `name` histogram."""
+    if not REGISTRY.enabled:
+        return _NOOP
+    return _Span(REGISTRY, name, tuple(sorted(labels.items())))
+
+
+def stage_timer(name, **labels):
+    """StageTimer recording each lap into the `name` histogram, labelled with its stage."""
+    if not REGISTRY.enabled:
+        return _NOOP
+    return StageTimer(REGISTRY, name, tuple(sorted(labels.items())))
+
+
+def count(name, value=1, **labels):
+    if not REGISTRY.enabled:
+        return
+    REGISTRY.increment(name, value, tuple(sorted(labels.items())))
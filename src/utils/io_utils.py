@@ -1,7 +1,6 @@
 import os
-import json
-import glob
 import logging
+from src.utils.results_store import DEFAULT_BACKEND, get_results_store, iter_results
 
 def read_queries_set(file_path: str) -> list:
     """
@@ -14,24 +13,11 @@ def read_queries_set(file_path: str) -> list:
     with open(file_path, 'r') as file:
         return [line.strip() for line in file if line.strip()]
 
-def add_query_result(output_dir: str, engine: str, query: str, result: list):
+def add_query_result(output_dir: str, engine: str, query: str, result: list, backend: str = DEFAULT_BACKEND):
     """
-    Saves the search results for a query to a JSON file.
+    Appends the search results for a query to the engine's results store.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    file_path = os.path.join(output_dir, f"{engine}_Results.json")
-
-    data = {}
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            try:
-                data = json.load(f)
-            except:
-                data = {}
-
-    data[query] = result
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
+    get_results_store(output_dir, engine, backend).append(query, result)
 
 def get_latest_results_dir(base_dir: str) -> str:
     """
@@ -45,9 +31,16 @@ def get_latest_results_dir(base_dir: str) -> str:
 def load_results(directory: str, engine: str) -> dict:
     """
     Loads the search results for a specific engine from the given directory.
+    Reads the JSONL/SQLite stores as well as legacy `{engine}_Results.json` files.
+    """
+    return dict(iter_results(directory, engine))
+
+def load_completed_queries(directory: str, engine: str) -> set:
+    """
+    Returns the set of queries that already have a non-empty result for an engine.
+    The store is streamed once; failed or empty queries are left out so they get retried.
     """
-    pattern = os.path.join(directory, f"{engine}_Result*.json")
-    files = glob.glob(pattern)
-    if not files: return {}
-    with open(files[0], "r", encoding="utf-8") as f:
-        return json.load(f)
+    latest = {}
+    for query, result in iter_results(directory, engine):
+        latest[query] = bool(result)
+    return {query for query, done in latest.items() if done}
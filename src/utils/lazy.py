@@ -0,0 +1,23 @@
+import sys
+import importlib
+
+
+def lazy_exports(package: str, exports: dict):
+    """
+    Module `__getattr__` and `__dir__` for a package whose public names (`exports`: name ->
+    submodule) are imported on first access, so importing the package does not pull in the
+    submodules' heavy dependencies.
+    """
+    module = sys.modules[package]
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        setattr(module, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(module)) | set(exports))
+
+    return __getattr__, __dir__
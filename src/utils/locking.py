@@ -0,0 +1,17 @@
+import threading
+
+
+class LockedState:
+    """
+    Mixin for objects guarding their state with `self._lock`: they pickle without the lock
+    (e.g. into spawned worker processes) and get a fresh one when unpickled.
+    """
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -1,12 +1,20 @@
 from urllib.parse import urlparse, parse_qs
+from functools import lru_cache
 import base64
 import logging
 
+NORMALIZE_CACHE_SIZE = 1 << 16
+
 def normalize_url(url: str) -> str:
     """
     Normalize a URL by removing 'www.', trailing slashes, and protocol.
+    Results are memoized in a bounded LRU cache, since popular URLs recur across queries and engines.
     """
     if not url: return ""
+    return _normalize_url_cached(url)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_url_cached(url: str) -> str:
     try:
         parsed = urlparse(url)
         netloc = parsed.netloc.lower().replace("www.", "")
@@ -52,3 +60,16 @@ def decode_bing_redirect(url: str) -> str:
         logging.warning(f"Failed to decode Bing URL: {url} | Error: {e}")
 
     return url
+
+def decode_google_redirect(url: str) -> str:
+    """
+    Decodes Google's `/url?q=<target>` wrappers, used by the non-JavaScript SERP markup.
+    """
+    if not url or "google." not in url or "/url?" not in url:
+        return url
+
+    params = parse_qs(urlparse(url).query)
+    for key in ("q", "url"):
+        if key in params and params[key][0].startswith("http"):
+            return params[key][0]
+    return url
@@ -0,0 +1,26 @@
+import time
+
+
+class ProgressTracker:
+    """Tracks completed work items and estimates the remaining time from the observed rate."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.start = time.monotonic()
+
+    def update(self, n: int = 1):
+        self.done += n
+
+    def eta_seconds(self) -> float:
+        if self.done == 0: return float("nan")
+        elapsed = time.monotonic() - self.start
+        return elapsed / self.done * (self.total - self.done)
+
+    def format(self) -> str:
+        eta = self.eta_seconds()
+        if eta != eta:
+            return f"{self.done}/{self.total} (ETA: --)"
+        minutes, seconds = divmod(int(eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{self.done}/{self.total} (ETA: {hours:d}:{minutes:02d}:{seconds:02d})"
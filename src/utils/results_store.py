@@ -0,0 +1,221 @@
+import os
+import json
+import glob
+import atexit
+import sqlite3
+import hashlib
+import logging
+from array import array
+import numpy as np
+from abc import ABC, abstractmethod
+
+DEFAULT_BACKEND = "jsonl"
+DEFAULT_FSYNC_EVERY = 50
+
+
+class ResultsStore(ABC):
+    """
+    Append-only store of (query, ranked URL list) records for one engine in one run directory.
+    Re-appending a query supersedes its earlier record.
+    """
+    extension = None
+
+    def __init__(self, output_dir: str, engine: str, fsync_every: int = DEFAULT_FSYNC_EVERY):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = self.path_for(output_dir, engine)
+        self.fsync_every = max(1, fsync_every)
+        self._pending = 0
+
+    @classmethod
+    def path_for(cls, output_dir: str, engine: str) -> str:
+        return os.path.join(output_dir, f"{engine}_Results.{cls.extension}")
+
+    def append(self, query: str, result: list):
+        self._write(query, result)
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        self._sync()
+        self._pending = 0
+
+    @classmethod
+    @abstractmethod
+    def iter_file(cls, path: str):
+        """Yields (query, result) records from an existing store file in write order."""
+
+    @abstractmethod
+    def _write(self, query: str, result: list):
+        pass
+
+    @abstractmethod
+    def _sync(self):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class JSONLResultsStore(ResultsStore):
+    """One JSON object per line. Each record is a single O_APPEND write, so a crash can at worst truncate the last line."""
+    extension = "jsonl"
+
+    def __init__(self, output_dir, engine, fsync_every=DEFAULT_FSYNC_EVERY):
+        super().__init__(output_dir, engine, fsync_every)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._terminate_partial_line()
+
+    def _terminate_partial_line(self):
+        # A crash can leave a truncated last line; start new records on a fresh line
+        size = os.path.getsize(self.path)
+        if size == 0: return
+        with open(self.path, "rb") as f:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                os.write(self._fd, b"\n")
+
+    def _write(self, query, result):
+        line = json.dumps({"query": query, "results": result}, ensure_ascii=False) + "\n"
+        os.write(self._fd, line.encode("utf-8"))
+
+    def _sync(self):
+        os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is None: return
+        self.sync()
+        os.close(self._fd)
+        self._fd = None
+
+    @classmethod
+    def iter_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip(): continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping corrupt record at {path}:{line_no}")
+                    continue
+                yield record["query"], record["results"]
+
+
+class SQLiteResultsStore(ResultsStore):
+    """SQLite in WAL mode; records are committed in batches of `fsync_every`."""
+    extension = "sqlite"
+
+    def __init__(self, output_dir, engine, fsync_every=DEFAULT_FSYNC_EVERY):
+        super().__init__(output_dir, engine, fsync_every)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS results "
+                           "(seq INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, results TEXT NOT NULL)")
+
+    def _write(self, query, result):
+        self._conn.execute("INSERT INTO results (query, results) VALUES (?, ?)",
+                           (query, json.dumps(result, ensure_ascii=False)))
+
+    def _sync(self):
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is None: return
+        self.sync()
+        self._conn.close()
+        self._conn = None
+
+    @classmethod
+    def iter_file(cls, path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for query, result in conn.execute("SELECT query, results FROM results ORDER BY seq"):
+                yield query, json.loads(result)
+        finally:
+            conn.close()
+
+
+BACKENDS = {
+    "jsonl": JSONLResultsStore,
+    "sqlite": SQLiteResultsStore,
+}
+
+_open_stores = {}
+
+
+def get_results_store(output_dir: str, engine: str, backend: str = DEFAULT_BACKEND) -> ResultsStore:
+    """Returns the open store for (output_dir, engine), opening it on first use."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown results backend: {backend}")
+    key = (os.path.abspath(output_dir), engine, backend)
+    store = _open_stores.get(key)
+    if store is None:
+        store = BACKENDS[backend](output_dir, engine)
+        _open_stores[key] = store
+    return store
+
+
+def close_results_stores():
+    """Flushes and closes every open store."""
+    while _open_stores:
+        _, store = _open_stores.popitem()
+        store.close()
+
+
+atexit.register(close_results_stores)
+
+
+def iter_results(directory: str, engine: str):
+    """
+    Streams (query, result) records for an engine: legacy `{engine}_Result*.json` files first,
+    then the SQLite and JSONL stores. Later records for the same query supersede earlier ones.
+    """
+    legacy = glob.glob(os.path.join(directory, f"{engine}_Result*.json"))
+    if legacy:
+        with open(legacy[0], "r", encoding="utf-8") as f:
+            yield from json.load(f).items()
+
+    for store_cls in (SQLiteResultsStore, JSONLResultsStore):
+        path = store_cls.path_for(directory, engine)
+        if os.path.exists(path):
+            yield from store_cls.iter_file(path)
+
+
+def query_key(query: str) -> int:
+    """Stable 64-bit key for a query string (the same in every process)."""
+    return int.from_bytes(hashlib.blake2b(query.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def iter_latest_results(directory: str, engine: str):
+    """
+    Like iter_results, but yields every query once, with its final record, at the position of
+    its first record (the order of `dict(iter_results(...))`).
+    Streams the store twice, or three times when queries were re-scraped; memory is 8 bytes per
+    record plus the final results of the re-scraped queries.
+    """
+    keys = array("q", (query_key(query) for query, _ in iter_results(directory, engine)))
+    unique, counts = np.unique(np.frombuffer(keys, dtype=np.int64), return_counts=True)
+    repeated = set(unique[counts > 1].tolist())
+    del keys, unique, counts
+
+    final = {}
+    if repeated:
+        for query, result in iter_results(directory, engine):
+            key = query_key(query)
+            if key in repeated:
+                final[key] = result
+
+    for query, result in iter_results(directory, engine):
+        key = query_key(query) if repeated else None
+        if key in repeated:
+            if key not in final: continue
+            result = final.pop(key)
+        yield query, result
+
+
+def has_results(directory: str, engine: str) -> bool:
+    if glob.glob(os.path.join(directory, f"{engine}_Result*.json")):
+        return True
+    return any(os.path.exists(cls.path_for(directory, engine)) for cls in (SQLiteResultsStore, JSONLResultsStore))
@@ -0,0 +1,79 @@
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_COMPRESS_LEVEL = 6
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def snapshot_path(root: str, digest: str) -> str:
+    return os.path.join(root, "objects", digest[:2], f"{digest}.html.gz")
+
+
+def read_snapshot(root: str, digest: str) -> str:
+    """Page HTML by content hash; needs no index connection, so worker processes can call it."""
+    with open(snapshot_path(root, digest), "rb") as f:
+        return gzip.decompress(f.read()).decode("utf-8")
+
+
+class SnapshotStore:
+    """
+    Archive of raw SERP HTML shared by every run. Pages are gzipped and stored once per
+    content hash under `objects/`, so identical pages (re-runs, resumed queries) cost nothing;
+    `index.sqlite` maps (run, engine, query) to the page's hash and final URL.
+    Saving is thread-safe; a query saved again in the same run replaces its earlier page.
+    """
+
+    def __init__(self, root: str, run: str = None, compress_level: int = DEFAULT_COMPRESS_LEVEL):
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.root = root
+        self.run = run
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS snapshots (run TEXT NOT NULL, engine TEXT NOT NULL, "
+                           "query TEXT NOT NULL, digest TEXT NOT NULL, url TEXT, saved_at REAL, "
+                           "PRIMARY KEY (run, engine, query))")
+
+    def save(self, engine: str, query: str, html: str, url: str = None) -> str:
+        """Archives a page for `query` in this store's run. Returns the content hash."""
+        data = html.encode("utf-8")
+        digest = content_digest(data)
+        path = snapshot_path(self.root, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(data, self.compress_level, mtime=0))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                               (self.run, engine, query, digest, url, time.time()))
+            self._conn.commit()
+        return digest
+
+    def load(self, digest: str) -> str:
+        return read_snapshot(self.root, digest)
+
+    def runs(self) -> list:
+        """Archived runs, oldest first."""
+        rows = self._conn.execute("SELECT run FROM snapshots GROUP BY run ORDER BY MIN(saved_at)")
+        return [run for run, in rows]
+
+    def entries(self, run: str, engine: str) -> list:
+        """(query, digest, url) of every page archived for an engine in a run, in save order."""
+        return self._conn.execute("SELECT query, digest, url FROM snapshots WHERE run = ? AND engine = ? "
+                                  "ORDER BY saved_at", (run, engine)).fetchall()
+
+    def close(self):
+        if self._conn is None: return
+        self._conn.close()
+        self._conn = None
@@ -0,0 +1,58 @@
+from array import array
+import numpy as np
+from src.utils.normalization import normalize_url
+
+# array('i')-style typecodes of integer ID arrays
+INTEGER_TYPECODES = "bBhHiIlLqQ"
+
+
+class URLTable:
+    """
+    Interns canonical (normalized) URLs into compact integer IDs.
+    IDs are dense and stable for the lifetime of the table, so ranked lists can be
+    stored as array('i') / NumPy int32 arrays and compared as integers.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._urls = []
+
+    def __len__(self):
+        return len(self._urls)
+
+    def intern(self, url: str) -> int:
+        """Returns the ID of the canonical form of `url`, assigning a new one if unseen."""
+        canonical = normalize_url(url)
+        url_id = self._ids.get(canonical)
+        if url_id is None:
+            url_id = len(self._urls)
+            self._ids[canonical] = url_id
+            self._urls.append(canonical)
+        return url_id
+
+    def encode(self, urls) -> array:
+        """
+        Encodes a ranked list of raw URLs as an array('i') of IDs. Integer arrays are taken to be
+        IDs from this table and pass through; any other sequence is interned element by element.
+        """
+        if isinstance(urls, array) and urls.typecode in INTEGER_TYPECODES:
+            return urls
+        if isinstance(urls, np.ndarray) and urls.dtype.kind in "iu":
+            return urls
+        return array("i", [self.intern(u) for u in urls])
+
+    def encode_np(self, urls) -> np.ndarray:
+        return np.asarray(self.encode(urls), dtype=np.int32)
+
+    def lookup(self, url_id: int) -> str:
+        return self._urls[url_id]
+
+    def decode(self, ids) -> list:
+        return [self._urls[i] for i in ids]
+
+
+
+def encode_together(*url_lists) -> tuple:
+    """Encodes ranked lists against one fresh URLTable, so their IDs are comparable with each other only."""
+    url_table = URLTable()
+    return tuple(url_table.encode(urls) for urls in url_lists)
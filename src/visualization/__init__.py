@@ -1 +1,10 @@
-from .plots import generate_plots
+from src.utils.lazy import lazy_exports
+
+# Public name -> submodule
+_EXPORTS = {
+    "generate_plots": ".plots",
+    "parse_plot_selection": ".plots",
+    "PLOTS": ".plots",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,101 +1,246 @@
 import os
+import json
+import hashlib
 import logging
-import statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
-def generate_plots(df, pr_data, bootstrap_results, output_dir):
-    plots_dir = os.path.join(output_dir, "plots")
-    os.makedirs(plots_dir, exist_ok=True)
+DEFAULT_DPI = 300
+DRAFT_DPI = 72
+# Distribution plots draw at most this many points per engine
+DEFAULT_MAX_POINTS = 2000
+PLOT_HASHES_FILE = "plot_hashes.json"
+METRIC_COLUMNS = ["Overlap %", "Precision@10", "MAP", "NDCG@10", "Spearman Rho", "Jaccard"]
 
-    logging.info("--- Generating Visualizations ---")
-    sns.set_theme(style="whitegrid", context="talk")
 
-    # 1. Spearman Boxplot
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(x="Engine", y="Spearman Rho", hue="Engine", data=df, palette="Set2", legend=False)
-    sns.stripplot(x="Engine", y="Spearman Rho", data=df, color='black', alpha=0.3, jitter=True)
-    plt.title("Ranking Correlation Distribution (Spearman Rho)")
-    plt.savefig(os.path.join(plots_dir, "spearman_boxplot.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 2. Overlap Histogram
-    plt.figure(figsize=(10, 6))
-    sns.histplot(data=df, x="Overlap %", hue="Engine", kde=True, bins=10, palette="viridis", element="step")
-    plt.title("Distribution of URL Overlap %")
-    plt.savefig(os.path.join(plots_dir, "overlap_histogram.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 3. NDCG Violin Plot
-    plt.figure(figsize=(10, 6))
-    sns.violinplot(x="Engine", y="NDCG@10", hue="Engine", data=df, palette="muted", inner="quartile", legend=False)
-    plt.title("NDCG@10 Density Distribution")
-    plt.savefig(os.path.join(plots_dir, "ndcg_violin.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 4. Precision at K Curve (Ranking Decay)
-    plt.figure(figsize=(12, 7))
-    for engine in pr_data.keys():
-        ks = sorted(pr_data[engine]['P@k'].keys())
-        p_means = [statistics.mean(pr_data[engine]['P@k'][k]) for k in ks]
-        plt.plot(ks, p_means, marker='o', linewidth=2, label=f"{engine}")
-
-    plt.title("Precision at Rank K")
-    plt.xlabel("Rank (k)")
-    plt.ylabel("Precision")
-    plt.legend()
-    plt.grid(True, linestyle="--")
-    plt.savefig(os.path.join(plots_dir, "p_at_k_curve.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 5. TRUE Precision-Recall Curve
-    plt.figure(figsize=(12, 7))
-    for engine in pr_data.keys():
-        # Calculate mean P and R for each k=1..10
-        ks = range(1, 11)
-        avg_precisions = [statistics.mean(pr_data[engine]['P@k'][k]) for k in ks]
-        avg_recalls = [statistics.mean(pr_data[engine]['R@k'][k]) for k in ks]
-
-        plt.plot(avg_recalls, avg_precisions, marker='o', linewidth=2, label=f"{engine}")
-
-    plt.title("Precision-Recall Curve (Avg over all queries)")
-    plt.xlabel("Recall")
-    plt.ylabel("Precision")
-    plt.legend()
-    plt.grid(True, linestyle="--")
-    plt.savefig(os.path.join(plots_dir, "precision_recall_curve.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 6. Bootstrap CI Visualization
+def downsample(df, column, max_points=DEFAULT_MAX_POINTS):
+    """
+    Per engine, at most `max_points` values of `column`: larger groups are replaced by evenly
+    spaced quantiles, which keep the distribution shape (box, violin, KDE) at a fixed size.
+    """
+    frames = []
+    for engine, values in df.groupby("Engine", sort=False)[column]:
+        values = values.dropna().to_numpy(dtype=float)
+        if len(values) > max_points:
+            values = np.quantile(values, (np.arange(max_points) + 0.5) / max_points)
+        frames.append(pd.DataFrame({"Engine": engine, column: values}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Engine", column])
+
+
+def binned(df, column, bins=10):
+    """Per-engine counts on bins shared by all engines (as histplot's common_bins), plus the edges."""
+    values = df[column].dropna().to_numpy(dtype=float)
+    if len(values) == 0:
+        return None, None
+    edges = np.histogram_bin_edges(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    frames = [pd.DataFrame({"Engine": engine, column: centers,
+                            "Count": np.histogram(group.dropna().to_numpy(dtype=float), bins=edges)[0]})
+              for engine, group in df.groupby("Engine", sort=False)[column]]
+    return pd.concat(frames, ignore_index=True), edges.tolist()
+
+
+def _curve_means(pr_data, curve):
+    return {engine: [float(np.mean(pr_data[engine][curve][k])) for k in sorted(pr_data[engine][curve].keys())]
+            for engine in pr_data.keys()}
+
+
+def plot_inputs(df, pr_data, bootstrap_results, summary=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    The pre-aggregated input of every figure, keyed by plot name. Inputs are small and
+    independent of the number of queries, so they are cheap to hash and to send to workers.
+    """
+    inputs = {
+        "spearman_boxplot": {"data": downsample(df, "Spearman Rho", max_points)},
+        "ndcg_violin": {"data": downsample(df, "NDCG@10", max_points)},
+        "p_at_k_curve": {"precision": _curve_means(pr_data, "P@k")},
+        "precision_recall_curve": {"precision": _curve_means(pr_data, "P@k"), "recall": _curve_means(pr_data, "R@k")},
+    }
+
+    hist, edges = binned(df, "Overlap %")
+    if hist is not None:
+        inputs["overlap_histogram"] = {"data": hist, "edges": edges}
+
     ci_data = []
     for eng, metrics in bootstrap_results.items():
         for metric, (lo, mean, hi) in metrics.items():
             ci_data.append(
                 {"Engine": eng, "Metric": metric, "Mean": mean, "Lower": lo, "Upper": hi, "Error": (hi - lo) / 2})
-
     if ci_data:
         ci_df = pd.DataFrame(ci_data)
-        plt.figure(figsize=(10, 6))
-        subset = ci_df[ci_df["Metric"] == "Spearman"]
+        subset = ci_df[ci_df["Metric"] == "Spearman"].reset_index(drop=True)
         if not subset.empty:
-             plt.errorbar(x=subset["Engine"], y=subset["Mean"], yerr=subset["Error"], fmt='o', capsize=10, linewidth=3,
-                     markersize=10, color='darkred')
-             plt.title("95% Confidence Intervals (Spearman Rho)")
-             plt.savefig(os.path.join(plots_dir, "bootstrap_ci.png"), dpi=300, bbox_inches='tight')
-        plt.close()
-
-    # 7. Metrics Heatmap
-    numeric_cols = ["Overlap %", "Precision@10", "MAP", "NDCG@10", "Spearman Rho", "Jaccard"]
+            inputs["bootstrap_ci"] = {"data": subset}
+
     # Filter columns that exist in df
-    existing_cols = [col for col in numeric_cols if col in df.columns]
+    existing_cols = [col for col in METRIC_COLUMNS if col in df.columns]
     if existing_cols:
-        summary = df.groupby("Engine")[existing_cols].mean()
-        plt.figure(figsize=(12, 6))
-        sns.heatmap(summary, annot=True, cmap="RdYlGn", fmt=".3f", linewidths=1)
-        plt.title("Average Performance Metrics Summary")
-        plt.tight_layout()
-        plt.savefig(os.path.join(plots_dir, "metrics_heatmap.png"), dpi=300, bbox_inches='tight')
-        plt.close()
-
-    logging.info(f"All plots saved to {plots_dir}")
+        if summary is None:
+            summary = df.groupby("Engine")[existing_cols].mean()
+        inputs["metrics_heatmap"] = {"summary": summary}
+    return inputs
+
+
+# 1. Spearman Boxplot
+def _spearman_boxplot(fig, data):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.boxplot(x="Engine", y="Spearman Rho", hue="Engine", data=data, palette="Set2", legend=False, ax=ax)
+    sns.stripplot(x="Engine", y="Spearman Rho", data=data, color='black', alpha=0.3, jitter=True, ax=ax)
+    ax.set_title("Ranking Correlation Distribution (Spearman Rho)")
+
+
+# 2. Overlap Histogram (pre-binned counts as weights)
+def _overlap_histogram(fig, data, edges):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.histplot(data=data, x="Overlap %", weights="Count", hue="Engine", kde=True, bins=edges,
+                 palette="viridis", element="step", ax=ax)
+    ax.set_title("Distribution of URL Overlap %")
+
+
+# 3. NDCG Violin Plot
+def _ndcg_violin(fig, data):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.violinplot(x="Engine", y="NDCG@10", hue="Engine", data=data, palette="muted", inner="quartile",
+                   legend=False, ax=ax)
+    ax.set_title("NDCG@10 Density Distribution")
+
+
+# 4. Precision at K Curve (Ranking Decay)
+def _p_at_k_curve(fig, precision):
+    ax = fig.subplots()
+    for engine, p_means in precision.items():
+        ax.plot(range(1, len(p_means) + 1), p_means, marker='o', linewidth=2, label=f"{engine}")
+    ax.set_title("Precision at Rank K")
+    ax.set_xlabel("Rank (k)")
+    ax.set_ylabel("Precision")
+    ax.legend()
+    ax.grid(True, linestyle="--")
+
+
+# 5. TRUE Precision-Recall Curve (mean P and R for each k=1..10)
+def _precision_recall_curve(fig, precision, recall):
+    ax = fig.subplots()
+    for engine in precision.keys():
+        ax.plot(recall[engine], precision[engine], marker='o', linewidth=2, label=f"{engine}")
+    ax.set_title("Precision-Recall Curve (Avg over all queries)")
+    ax.set_xlabel("Recall")
+    ax.set_ylabel("Precision")
+    ax.legend()
+    ax.grid(True, linestyle="--")
+
+
+# 6. Bootstrap CI Visualization
+def _bootstrap_ci(fig, data):
+    ax = fig.subplots()
+    ax.errorbar(x=data["Engine"], y=data["Mean"], yerr=data["Error"], fmt='o', capsize=10, linewidth=3,
+                markersize=10, color='darkred')
+    ax.set_title("95% Confidence Intervals (Spearman Rho)")
+
+
+# 7. Metrics Heatmap
+def _metrics_heatmap(fig, summary):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.heatmap(summary, annot=True, cmap="RdYlGn", fmt=".3f", linewidths=1, ax=ax)
+    ax.set_title("Average Performance Metrics Summary")
+    fig.tight_layout()
+
+
+# Plot name (also the PNG file name) -> (renderer, figure size)
+PLOTS = {
+    "spearman_boxplot": (_spearman_boxplot, (10, 6)),
+    "overlap_histogram": (_overlap_histogram, (10, 6)),
+    "ndcg_violin": (_ndcg_violin, (10, 6)),
+    "p_at_k_curve": (_p_at_k_curve, (12, 7)),
+    "precision_recall_curve": (_precision_recall_curve, (12, 7)),
+    "bootstrap_ci": (_bootstrap_ci, (10, 6)),
+    "metrics_heatmap": (_metrics_heatmap, (12, 6)),
+}
+
+
+def render_plot(name, inputs, path, dpi=DEFAULT_DPI):
+    """Renders one figure to `path`. Uses Figure directly (no pyplot), so it is safe in worker processes."""
+    # matplotlib and seaborn are only imported once a figure is drawn, with the headless Agg backend
+    import matplotlib
+    matplotlib.use("Agg")
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    sns.set_theme(style="whitegrid", context="talk")
+    render, figsize = PLOTS[name]
+    fig = Figure(figsize=figsize)
+    render(fig, **inputs)
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return name
+
+
+def input_digest(name, inputs, dpi):
+    """Hash of a figure's input summary and render settings."""
+    h = hashlib.blake2b(f"{name}:{dpi}".encode("utf-8"), digest_size=16)
+    for key in sorted(inputs):
+        value = inputs[key]
+        h.update(key.encode("utf-8"))
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(list(value.columns)).encode("utf-8"))
+            h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        else:
+            h.update(repr(value).encode("utf-8"))
+    return h.hexdigest()
+
+
+def parse_plot_selection(selection):
+    """'all', 'none' or a comma-separated list of plot names -> list of plot names."""
+    if selection is None or selection == "all":
+        return list(PLOTS)
+    if selection == "none":
+        return []
+    names = [name.strip() for name in selection.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PLOTS]
+    if unknown:
+        raise ValueError(f"Unknown plots: {', '.join(unknown)} (choose from {', '.join(PLOTS)})")
+    return names
+
+
+def generate_plots(df, pr_data, bootstrap_results, output_dir, summary=None, plots=None, dpi=DEFAULT_DPI,
+                   workers=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Renders the selected `plots` (default: all) into `output_dir/plots`, one figure per worker process.
+    Figures whose input hash and dpi are unchanged since the last render are skipped.
+    `summary` (Engine x metric means) overrides the heatmap input computed from `df`.
+    """
+    plots_dir = os.path.join(output_dir, "plots")
+    os.makedirs(plots_dir, exist_ok=True)
+
+    logging.info("--- Generating Visualizations ---")
+    selected = list(PLOTS) if plots is None else plots
+    inputs = plot_inputs(df, pr_data, bootstrap_results, summary, max_points)
+
+    hashes_path = os.path.join(plots_dir, PLOT_HASHES_FILE)
+    previous = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path, "r") as f:
+            previous = json.load(f)
+
+    digests = {name: input_digest(name, inputs[name], dpi) for name in selected if name in inputs}
+    paths = {name: os.path.join(plots_dir, f"{name}.png") for name in digests}
+    todo = [name for name in digests if previous.get(name) != digests[name] or not os.path.exists(paths[name])]
+    skipped = len(digests) - len(todo)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render_plot, todo, [inputs[name] for name in todo],
+                              [paths[name] for name in todo], [dpi] * len(todo)))
+    else:
+        for name in todo:
+            render_plot(name, inputs[name], paths[name], dpi)
+
+    previous.update({name: digests[name] for name in todo})
+    with open(hashes_path, "w") as f:
+        json.dump(previous, f, indent=2, sort_keys=True)
+
+    logging.info(f"Rendered {len(todo)} plots ({skipped} unchanged) to {plots_dir}")
@@ -0,0 +1,60 @@
+"""
+HTTPSearchBackend against the canned-SERP fixture server: clean pages yield their results,
+while CAPTCHA pages, pages without a result container and HTTP 429 are deferred to the browser.
+"""
+import os
+import sys
+import threading
+
+import pytest
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, "benchmarks"))
+
+from serp_fixture_server import ENGINE_PATHS, fixture_config, result_urls, serve
+from src.scraper import GoogleEngine, BingEngine, YahooEngine, HTTPSearchBackend, LinkFilter
+
+ENGINE_CLASSES = {"Google": GoogleEngine, "Bing": BingEngine, "Yahoo!": YahooEngine}
+LIMIT = 10
+
+
+@pytest.fixture(scope="module")
+def engines():
+    server = serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with open(os.path.join(PROJECT_ROOT, "config", "experiment.yaml"), "r") as f:
+        config = fixture_config(yaml.safe_load(f), *server.server_address)
+    try:
+        yield {name: engine_cls(config["search_engines"][name], LIMIT, 0, 0,
+                                link_filter=LinkFilter.from_config(config.get("link_filter"),
+                                                                   config["search_engines"][name].get("link_filter")))
+               for name, engine_cls in ENGINE_CLASSES.items()}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def scrape(engines, queries):
+    results = {}
+    on_result = lambda engine, query, links: results.__setitem__((engine, query), links)
+    deferred = HTTPSearchBackend(engines).run({name: list(queries) for name in engines}, on_result)
+    return results, deferred
+
+
+def test_ok_pages_yield_ranked_results(engines):
+    query = "respiratory system facts"
+    results, deferred = scrape(engines, [query])
+    assert deferred == {name: [] for name in engines}
+    for name in engines:
+        assert results[(name, query)] == result_urls(ENGINE_PATHS[name], query)[:LIMIT]
+
+
+@pytest.mark.parametrize("fault", ["captcha", "no-container", "throttle"])
+def test_failed_pages_are_deferred_to_the_browser(engines, fault):
+    query = f"fault:{fault} respiratory system facts"
+    results, deferred = scrape(engines, [query, "heart anatomy"])
+    assert deferred == {name: [query] for name in engines}
+    assert sorted(results) == sorted((name, "heart anatomy") for name in engines)